@@ -1,12 +1,18 @@
 import asyncio
 
 from elasticsearch import Elasticsearch as _Elasticsearch  # noqa # isort:skip
+from elasticsearch.client.utils import SKIP_IN_PATH, query_params  # noqa # isort:skip
 from elasticsearch.connection_pool import (ConnectionSelector, # noqa # isort:skip
                                            RoundRobinSelector)
-from elasticsearch.serializer import JSONSerializer  # noqa # isort:skip
 
+from .batching import GetBatcher  # noqa # isort:skip
+from .cache import ResponseCache  # noqa # isort:skip
 from .exceptions import *  # noqa # isort:skip
-from .pool import AIOHttpConnectionPool  # noqa # isort:skip
+from .pool import (AIOHttpConnectionPool, EWMASelector,  # noqa # isort:skip
+                   LeastOutstandingSelector, PowerOfTwoChoicesSelector,
+                   ZoneAwareSelector)
+from .retry import RetryBudget  # noqa # isort:skip
+from .serializer import JSONSerializer  # noqa # isort:skip
 from .transport import AIOHttpTransport  # noqa # isort:skip
 
 
@@ -21,6 +27,9 @@ class Elasticsearch(_Elasticsearch):
         transport_class=AIOHttpTransport,
         *,
         loop=None,
+        batch_gets=False,
+        batch_gets_window=0,
+        batch_gets_max_size=100,
         **kwargs
     ):
         if loop is None:
@@ -32,7 +41,52 @@ class Elasticsearch(_Elasticsearch):
 
         super().__init__(hosts, transport_class=transport_class, **kwargs)
 
+        # concurrent `get()` calls are sent as `mget` requests
+        self.get_batcher = None
+        if batch_gets:
+            self.get_batcher = GetBatcher(
+                self,
+                window=batch_gets_window,
+                max_size=batch_gets_max_size,
+                loop=self.loop,
+            )
+
+    @query_params(
+        '_source',
+        '_source_excludes',
+        '_source_includes',
+        'parent',
+        'preference',
+        'realtime',
+        'refresh',
+        'routing',
+        'stored_fields',
+        'version',
+        'version_type',
+    )
+    def get(self, index, id, doc_type='_doc', params=None, headers=None):
+        if (
+            self.get_batcher is None or
+            headers or
+            not self.get_batcher.can_batch(doc_type, params)
+        ):
+            # elasticsearch-py before 7.10 takes no headers
+            kwargs = {} if headers is None else {'headers': headers}
+            return super().get(
+                index, id, doc_type=doc_type, params=params, **kwargs
+            )
+
+        for param in (index, id):
+            if param in SKIP_IN_PATH:
+                raise ValueError(
+                    'Empty value passed for a required argument.',
+                )
+
+        return self.get_batcher.get(index, id, params)
+
     async def close(self):
+        if self.get_batcher is not None:
+            await self.get_batcher.close()
         await self.transport.close()
 
     async def __aenter__(self):  # noqa
@@ -0,0 +1,149 @@
+import asyncio
+
+from elasticsearch.client.utils import GLOBAL_PARAMS
+
+from .exceptions import NotFoundError, TransportError
+
+__all__ = ('GetBatcher', )
+
+
+# params of get() which mget supports for all the documents
+_MGET_PARAMS = frozenset(GLOBAL_PARAMS + (
+    '_source', '_source_excludes', '_source_includes', 'preference',
+    'realtime', 'refresh', 'routing', 'stored_fields',
+    'ignore', 'request_timeout',
+))
+
+
+class _Batch:
+
+    def __init__(self, params):
+        self.params = params
+        self.gets = []
+        self.handle = None
+
+
+class GetBatcher:
+    """
+    Collect concurrent ``get()`` calls into ``mget`` requests.
+
+    A batch is sent ``window`` seconds after its first call, on the next
+    iteration of the loop by default, or as soon as it has ``max_size``
+    calls. Calls with the same params go to the same batch. Every call
+    gets its own document or raises ``NotFoundError`` like ``get()``.
+    """
+
+    def __init__(self, es, window=0, max_size=100, *, loop):
+        self.es = es
+        self.window = window
+        self.max_size = max_size
+        self.loop = loop
+
+        self._batches = {}
+        # mget requests in flight
+        self._tasks = set()
+
+    @staticmethod
+    def can_batch(doc_type, params):
+        return (
+            doc_type in (None, '_doc') and
+            _MGET_PARAMS.issuperset(params)
+        )
+
+    async def close(self):
+        """Cancel the calls of batches waiting or in flight."""
+        batches, self._batches = self._batches, {}
+
+        for batch in batches.values():
+            batch.handle.cancel()
+            for _, _, _, fut in batch.gets:
+                fut.cancel()
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, loop=self.loop, return_exceptions=True)
+
+    async def get(self, index, id, params):
+        params = dict(params)
+
+        ignore = params.pop('ignore', ())
+        if isinstance(ignore, int):
+            ignore = (ignore, )
+
+        key = tuple(sorted(
+            (name, str(value)) for name, value in params.items()
+        ))
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(params)
+            batch.handle = self.loop.call_later(self.window, self._send, key)
+
+        fut = self.loop.create_future()
+        batch.gets.append((index, id, ignore, fut))
+
+        if len(batch.gets) >= self.max_size:
+            self._send(key)
+
+        return await fut
+
+    def _send(self, key):
+        batch = self._batches.pop(key)
+        batch.handle.cancel()
+
+        task = asyncio.ensure_future(self._mget(batch), loop=self.loop)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _mget(self, batch):
+        docs = [{'_index': index, '_id': id} for index, id, _, _ in batch.gets]
+
+        try:
+            response = await self.es.mget(
+                body={'docs': docs},
+                params=batch.params,
+            )
+        except asyncio.CancelledError:
+            for _, _, _, fut in batch.gets:
+                fut.cancel()
+            raise
+        except Exception as e:
+            for _, _, _, fut in batch.gets:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, _, ignore, fut), doc in zip(batch.gets, response['docs']):
+            # the caller is cancelled
+            if fut.done():
+                continue
+
+            try:
+                fut.set_result(self._get_result(doc, ignore))
+            except TransportError as e:
+                fut.set_exception(e)
+
+    def _get_result(self, doc, ignore):
+        error = doc.get('error')
+
+        if error is None:
+            if doc.get('found') or 404 in ignore:
+                return doc
+
+            raise NotFoundError(
+                404, self.es.transport.serializer.dumps(doc), doc,
+            )
+
+        if isinstance(error, dict):
+            error = error.get('type', error)
+
+        # get() of a missing index responds with 404
+        if error == 'index_not_found_exception':
+            if 404 in ignore:
+                return doc
+
+            raise NotFoundError(404, error, doc)
+
+        raise TransportError('N/A', error, doc)
@@ -0,0 +1,72 @@
+import collections
+
+__all__ = ('ResponseCache', )
+
+
+class ResponseCache:
+    """
+    In-memory cache of responses with TTL and LRU eviction.
+
+    Entries expire ``ttl`` seconds after they are set, the least recently
+    used ones are evicted to keep the total size under ``max_size`` bytes.
+    Entries larger than ``max_size`` aren't cached.
+
+    Subclasses can store responses elsewhere by overriding ``get()``,
+    ``set()`` and ``clear()``.
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024, ttl=60, *, loop):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.loop = loop
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # key -> (expiration time, value, size), the last one used last
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the value cached with ``key``, ``None`` if there is none."""
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            expires_at, value, _ = entry
+
+            if expires_at > self.loop.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            self._pop(key)
+
+        self.misses += 1
+        return None
+
+    def set(self, key, value, size):
+        """Cache ``value`` of ``size`` bytes with ``key``."""
+        if key in self._entries:
+            self._pop(key)
+
+        if size > self.max_size:
+            return
+
+        while self.size + size > self.max_size:
+            self._pop(next(iter(self._entries)))
+            self.evictions += 1
+
+        self._entries[key] = (self.loop.time() + self.ttl, value, size)
+        self.size += size
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _pop(self, key):
+        _, _, size = self._entries.pop(key)
+        self.size -= size
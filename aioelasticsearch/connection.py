@@ -1,17 +1,23 @@
 import asyncio
+import gzip
+import logging
 
 import aiohttp
 
 from .exceptions import ConnectionError, ConnectionTimeout, SSLError  # noqa # isort:skip
+from .tracing import RequestTrace, trace_config  # noqa # isort:skip
 
 from elasticsearch.connection import Connection  # noqa # isort:skip
 from yarl import URL  # noqa # isort:skip
 
+logger = logging.getLogger('elasticsearch')
+
 
 def session_factory(**kwargs):
     connector = aiohttp.TCPConnector(
         loop=kwargs.get('loop'),
         limit=kwargs.get('limit', 10),
+        limit_per_host=kwargs.get('limit_per_host', 0),
         use_dns_cache=kwargs.get('use_dns_cache', False),
         ssl=kwargs.get('ssl', False),
     )
@@ -19,6 +25,7 @@ def session_factory(**kwargs):
     return aiohttp.ClientSession(
         auth=kwargs.get('auth'),
         connector=connector,
+        trace_configs=kwargs.get('trace_configs'),
     )
 
 
@@ -34,6 +41,12 @@ class AIOHttpConnection(Connection):
         verify_certs=False,
         maxsize=10,
         headers=None,
+        decode_response=True,
+        http_compress=False,
+        http_compress_level=6,
+        http_compress_executor_threshold=None,
+        trace_requests=False,
+        latency_ewma_alpha=.3,
         *,
         loop,
         **kwargs
@@ -50,6 +63,17 @@ class AIOHttpConnection(Connection):
         self.headers = headers
         self.headers.setdefault('Content-Type', 'application/json')
 
+        # gzip request bodies and ask for compressed responses,
+        # bodies of at least `http_compress_executor_threshold` bytes
+        # are compressed in the default executor to not block the loop
+        self.http_compress = http_compress
+        self.http_compress_level = http_compress_level
+        self.http_compress_executor_threshold = (
+            http_compress_executor_threshold
+        )
+        if self.http_compress:
+            self.headers.setdefault('Accept-Encoding', 'gzip,deflate')
+
         self.loop = loop
 
         if http_auth is not None:
@@ -68,11 +92,28 @@ class AIOHttpConnection(Connection):
 
         self.verify_certs = verify_certs
 
+        # return raw bytes and leave decoding to the deserializer
+        self.decode_response = decode_response
+
         self.base_url = URL.build(scheme='https' if self.use_ssl else 'http',
                                   host=host,
                                   port=port,
                                   path=self.url_prefix)
 
+        # `TransportMetrics` to record requests into, set by the transport
+        self.metrics = kwargs.get('metrics')
+
+        # load and latency of the node for selectors, the latency is
+        # updated by successful requests only, fast failures and cancelled
+        # requests would make a broken node look fast
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.latency_ewma_alpha = latency_ewma_alpha
+
+        # time request phases with `trace_config()` signals,
+        # a custom session has to be created with it
+        self.trace_requests = trace_requests
+
         self.session = kwargs.get('session')
         self.close_session = False
 
@@ -89,6 +130,7 @@ class AIOHttpConnection(Connection):
                 ssl=ssl_context if self.verify_certs else False,
                 limit=maxsize,
                 use_dns_cache=kwargs.get('use_dns_cache', False),
+                trace_configs=[trace_config()] if trace_requests else None,
             )
 
             self.close_session = True
@@ -105,55 +147,161 @@ class AIOHttpConnection(Connection):
         body=None,
         headers=None,
         timeout=None,
-        ignore=()
+        ignore=(),
+        stream=False
+    ):
+        self.in_flight += 1
+        start = self.loop.time()
+
+        try:
+            response = await self._perform_request(
+                method, url, params, body, headers, timeout, ignore, stream,
+            )
+        finally:
+            self.in_flight -= 1
+
+        self._update_latency(self.loop.time() - start)
+
+        return response
+
+    async def warmup(self, count=1, timeout=None):
+        """
+        Open up to ``count`` keep-alive sockets to the node with concurrent
+        ``HEAD /`` requests, at most ``maxsize`` are kept by the session.
+
+        The requests don't count into the load and the latency of the node.
+        Failures are logged and ignored, return the number of successful
+        requests.
+        """
+        results = await asyncio.gather(
+            *[
+                self._perform_request(
+                    'HEAD', '/', None, None, None, timeout, (), False,
+                )
+                for _ in range(count)
+            ],
+            loop=self.loop,
+            return_exceptions=True
+        )
+
+        return sum(not isinstance(result, Exception) for result in results)
+
+    def _update_latency(self, duration):
+        if self.latency_ewma is None:
+            self.latency_ewma = duration
+        else:
+            self.latency_ewma += self.latency_ewma_alpha * (
+                duration - self.latency_ewma
+            )
+
+    async def _perform_request(
+        self,
+        method,
+        url,
+        params,
+        body,
+        headers,
+        timeout,
+        ignore,
+        stream
     ):
         url_path = url
 
         url = (self.base_url / url.lstrip('/')).with_query(params)
 
+        data = body
+        headers = self._build_headers(headers)
+
+        if self.http_compress and body:
+            data = await self._compress(body)
+
+            headers = headers.copy()
+            headers['Content-Encoding'] = 'gzip'
+
+        trace = RequestTrace(self.loop) if self.trace_requests else None
+
         start = self.loop.time()
         try:
-            async with self.session.request(
-                    method,
-                    url,
-                    data=body,
-                    headers=self._build_headers(headers),
-                    timeout=timeout or self.timeout) as response:
-                raw_data = await response.text()
+            response = await self.session.request(
+                method,
+                url,
+                data=data,
+                headers=headers,
+                # a session shared by connections has no auth of its own
+                auth=self.http_auth,
+                timeout=timeout or self.timeout,
+                trace_request_ctx=trace,
+            )
+
+            # successful streamed responses are left unread for the caller
+            streamed = stream and 200 <= response.status < 300
+
+            try:
+                if streamed:
+                    raw_data = None
+                    received = 0
+                else:
+                    raw_data = await response.read()
+                    received = len(raw_data)
+
+                    if self.decode_response:
+                        # decodes the body read already
+                        raw_data = await response.text()
 
-                duration = self.loop.time() - start
+                    if trace is not None:
+                        trace.end('body')
+            except BaseException:
+                response.release()
+                raise
+
+            duration = self.loop.time() - start
 
         except aiohttp.ClientSSLError as exc:
+            duration = self.loop.time() - start
+
             self.log_request_fail(
                 method,
                 url,
                 url_path,
                 body,
-                self.loop.time() - start,
+                duration,
                 exception=exc,
             )
+            self._observe(
+                method, url_path, 'N/A', duration, data, trace=trace,
+            )
             raise SSLError('N/A', str(exc), exc)
 
         except asyncio.TimeoutError as exc:
+            duration = self.loop.time() - start
+
             self.log_request_fail(
                 method,
                 url,
                 url_path,
                 body,
-                self.loop.time() - start,
+                duration,
                 exception=exc,
             )
+            self._observe(
+                method, url_path, 'TIMEOUT', duration, data, trace=trace,
+            )
             raise ConnectionTimeout('TIMEOUT', str(exc), exc)
 
         except aiohttp.ClientError as exc:
+            duration = self.loop.time() - start
+
             self.log_request_fail(
                 method,
                 url,
                 url_path,
                 body,
-                self.loop.time() - start,
+                duration,
                 exception=exc,
             )
+            self._observe(
+                method, url_path, 'N/A', duration, data, trace=trace,
+            )
 
             raise ConnectionError('N/A', str(exc), exc)
 
@@ -163,6 +311,9 @@ class AIOHttpConnection(Connection):
             not (200 <= response.status < 300) and
             response.status not in ignore
         ):
+            if not self.decode_response:
+                raw_data = raw_data.decode('utf-8', 'replace')
+
             self.log_request_fail(
                 method,
                 url,
@@ -172,6 +323,10 @@ class AIOHttpConnection(Connection):
                 response.status,
                 raw_data,
             )
+            self._observe(
+                method, url_path, response.status, duration, data, received,
+                trace,
+            )
             self._raise_error(response.status, raw_data)
 
         self.log_request_success(
@@ -180,12 +335,61 @@ class AIOHttpConnection(Connection):
             url_path,
             body,
             response.status,
-            raw_data,
+            '<streamed>' if streamed else raw_data,
             duration,
         )
+        self._observe(
+            method, url_path, response.status, duration, data, received,
+            trace,
+        )
+
+        if streamed:
+            return response.status, response.headers, response
 
         return response.status, response.headers, raw_data
 
+    def _observe(
+        self,
+        method,
+        url,
+        status,
+        duration,
+        data,
+        received=0,
+        trace=None,
+    ):
+        phases = trace.phases if trace is not None else None
+
+        if phases:
+            logger.debug('%s %s%s [%r]', method, self.host, url, trace)
+
+        if self.metrics is None:
+            return
+
+        self.metrics.observe_request(
+            self.host,
+            method,
+            url,
+            status,
+            duration,
+            bytes_sent=len(data) if data else 0,
+            bytes_received=received,
+            phases=phases,
+        )
+
+    async def _compress(self, body):
+        if isinstance(body, str):
+            body = body.encode('utf-8', 'surrogatepass')
+
+        threshold = self.http_compress_executor_threshold
+
+        if threshold is not None and len(body) >= threshold:
+            return await self.loop.run_in_executor(
+                None, gzip.compress, body, self.http_compress_level,
+            )
+
+        return gzip.compress(body, self.http_compress_level)
+
     def _build_headers(self, headers):
         if headers:
             final_headers = self.headers.copy()
@@ -1,43 +1,39 @@
+import abc
+import asyncio
+import collections
+import inspect
 import logging
+from operator import methodcaller
 
-from elasticsearch.helpers import ScanError
+from elasticsearch.client.utils import _make_path
+from elasticsearch.helpers import BulkIndexError, ScanError, expand_action
 
-from aioelasticsearch import NotFoundError
+from aioelasticsearch import NotFoundError, TransportError
+from aioelasticsearch.streaming import SearchResponseStream
 
-__all__ = ('Scan', 'ScanError')
+__all__ = (
+    'BulkIndexError', 'PointInTimeScan', 'Scan', 'ScanError', 'SlicedScan',
+    'bulk', 'expand_action', 'parallel_bulk', 'reindex', 'streaming_bulk',
+)
 
 
 logger = logging.getLogger('elasticsearch')
 
 
-class Scan:
+class _PagedScan(abc.ABC):
+
+    _request_name = 'Search'
 
     def __init__(
         self,
         es,
-        query=None,
-        scroll='5m',
         raise_on_error=True,
-        preserve_order=False,
         size=1000,
-        clear_scroll=True,
-        scroll_kwargs=None,
-        **kwargs
+        prefetch=0,
     ):
         self._es = es
-
-        if not preserve_order:
-            query = query.copy() if query else {}
-            query['sort'] = '_doc'
-        self._query = query
-        self._scroll = scroll
         self._raise_on_error = raise_on_error
         self._size = size
-        self._clear_scroll = clear_scroll
-        self._kwargs = kwargs
-        self._scroll_kwargs = scroll_kwargs or {}
-
-        self._scroll_id = None
 
         self._total = 0
 
@@ -47,13 +43,24 @@ class Scan:
         self._hits_idx = 0
         self._successful_shards = 0
         self._total_shards = 0
+        # position to request the page following the consumed one
+        self._cursor = None
+
+        # number of pages requested ahead of the consumer
+        self._prefetch = prefetch
+        self._prefetch_task = None
+        self._prefetch_cursor = None
+        self._prefetch_error = None
+        self._pages = None
+        self._pages_sem = None
 
     async def __aenter__(self):  # noqa
         await self._do_search()
         return self
 
     async def __aexit__(self, *exc_info):  # noqa
-        await self._do_clear_scroll()
+        await self._cancel_prefetch()
+        await self._do_close()
 
     def __aiter__(self):
         if self._initial:
@@ -62,81 +69,1082 @@ class Scan:
         return self
 
     async def __anext__(self):  # noqa
-        if self._done:
-            raise StopAsyncIteration
+        while self._hits_idx >= len(self._hits):
+            if await self._read_stream():
+                continue
+
+            if self._done:
+                raise StopAsyncIteration
 
-        if self._hits_idx >= len(self._hits):
             if self._successful_shards < self._total_shards:
                 logger.warning(
-                    'Scroll request has only succeeded on %d shards out of %d.',  # noqa
+                    self._request_name +
+                    ' request has only succeeded on %d shards out of %d.',
                     self._successful_shards, self._total_shards
                 )
                 if self._raise_on_error:
                     raise ScanError(
-                        self._scroll_id,
-                        'Scroll request has only succeeded on {} shards out of {}.'  # noqa
-                        .format(self._successful_shards, self._total_shards)
+                        self._context_id(),
+                        '{} request has only succeeded on {} shards out of {}.'  # noqa
+                        .format(self._request_name,
+                                self._successful_shards, self._total_shards)
                     )
 
-            await self._do_scroll()
+            await self._do_next_page()
+
         ret = self._hits[self._hits_idx]
         self._hits_idx += 1
         return ret
 
     @property
-    def scroll_id(self):
+    def total(self):
         if self._initial:
             raise RuntimeError("Scan operations should be done "
                                "inside async context manager")
+        return self._total
 
-        return self._scroll_id
+    async def _do_search(self):
+        self._initial = False
+
+        resp = await self._fetch_first_page()
+
+        if resp is None:
+            self._done = True
+            return
+
+        self._total = resp['hits']['total']
+        self._update_state(resp)
+
+        if self._prefetch and not self._done:
+            self._start_prefetch()
+
+    async def _do_next_page(self):
+        if self._prefetch_task is None:
+            resp = await self._fetch_page(self._cursor)
+        else:
+            # prefetching stopped on the error, it's raised again
+            if self._prefetch_error is not None:
+                raise self._prefetch_error
+
+            resp = await self._pages.get()
+            self._pages_sem.release()
+
+            if isinstance(resp, Exception):
+                self._prefetch_error = resp
+                raise resp
+
+        self._update_state(resp)
+
+    def _start_prefetch(self):
+        loop = self._es.loop
+
+        self._pages = asyncio.Queue(loop=loop)
+        self._pages_sem = asyncio.Semaphore(self._prefetch, loop=loop)
+        self._prefetch_cursor = self._cursor
+        self._prefetch_task = asyncio.ensure_future(
+            self._do_prefetch(),
+            loop=loop,
+        )
+
+    async def _do_prefetch(self):
+        try:
+            while self._prefetch_cursor is not None:
+                await self._pages_sem.acquire()
+
+                resp = await self._fetch_page(self._prefetch_cursor)
+                self._pages.put_nowait(resp)
+
+                self._prefetch_cursor = self._next_cursor(resp)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self._pages.put_nowait(exc)
+
+    async def _cancel_prefetch(self):
+        if self._prefetch_task is None:
+            return
+
+        self._prefetch_task.cancel()
+
+        try:
+            await self._prefetch_task
+        except asyncio.CancelledError:
+            pass
+
+    def _update_state(self, resp):
+        self._hits = resp['hits']['hits']
+        self._hits_idx = 0
+        self._cursor = self._next_cursor(resp)
+        self._successful_shards = resp['_shards']['successful']
+        self._total_shards = resp['_shards']['total']
+        self._done = self._cursor is None
+
+    async def _read_stream(self):
+        # load the next batch of hits of a streamed page
+        return False
+
+    @abc.abstractmethod
+    def _context_id(self):
+        pass
+
+    @abc.abstractmethod
+    async def _fetch_first_page(self):
+        pass
+
+    @abc.abstractmethod
+    async def _fetch_page(self, cursor):
+        pass
+
+    @abc.abstractmethod
+    def _next_cursor(self, resp):
+        pass
+
+    @abc.abstractmethod
+    async def _do_close(self):
+        pass
+
+
+class Scan(_PagedScan):
+
+    _request_name = 'Scroll'
+
+    def __init__(
+        self,
+        es,
+        query=None,
+        scroll='5m',
+        raise_on_error=True,
+        preserve_order=False,
+        size=1000,
+        clear_scroll=True,
+        scroll_kwargs=None,
+        prefetch=0,
+        stream=False,
+        **kwargs
+    ):
+        assert not(
+            prefetch and stream
+        ), 'Provide `prefetch` or `stream`, not both.'
+
+        super().__init__(
+            es,
+            raise_on_error=raise_on_error,
+            size=size,
+            prefetch=prefetch,
+        )
+
+        scroll_kwargs = scroll_kwargs or {}
+
+        if stream:
+            # parse pages hit by hit instead of loading them at once
+            kwargs = _with_stream_param(kwargs)
+            scroll_kwargs = _with_stream_param(scroll_kwargs)
+
+        if not preserve_order:
+            query = query.copy() if query else {}
+            query['sort'] = '_doc'
+        self._query = query
+        self._scroll = scroll
+        self._clear_scroll = clear_scroll
+        self._kwargs = kwargs
+        self._scroll_kwargs = scroll_kwargs
+
+        self._scroll_id = None
+        self._stream = None
+        self._stream_hits = 0
 
     @property
-    def total(self):
+    def scroll_id(self):
         if self._initial:
             raise RuntimeError("Scan operations should be done "
                                "inside async context manager")
-        return self._total
 
-    async def _do_search(self):
-        self._initial = False
+        return self._scroll_id
+
+    def _context_id(self):
+        return self._scroll_id
 
+    async def _fetch_first_page(self):
         try:
-            resp = await self._es.search(
+            return await self._es.search(
                 body=self._query,
                 scroll=self._scroll,
                 size=self._size,
                 **self._kwargs
             )
         except NotFoundError:
-            self._done = True
-            return
-        else:
-            self._total = resp['hits']['total']
-            self._update_state(resp)
+            return None
 
-    async def _do_scroll(self):
-        resp = await self._es.scroll(
-            scroll_id=self._scroll_id,
+    async def _fetch_page(self, cursor):
+        return await self._es.scroll(
+            scroll_id=cursor,
             scroll=self._scroll,
             **self._scroll_kwargs,
         )
-        self._update_state(resp)
 
-        if self._done:
-            raise StopAsyncIteration
+    def _next_cursor(self, resp):
+        if not resp['hits']['hits']:
+            return None
+        return resp.get('_scroll_id')
+
+    async def _do_close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+        await self._do_clear_scroll()
 
     async def _do_clear_scroll(self):
-        if self._scroll_id is not None and self._clear_scroll:
+        if not self._clear_scroll:
+            return
+
+        # prefetching may be a scroll id ahead of the consumer
+        scroll_ids = []
+        for scroll_id in (self._scroll_id, self._prefetch_cursor):
+            if scroll_id is not None and scroll_id not in scroll_ids:
+                scroll_ids.append(scroll_id)
+
+        if scroll_ids:
             await self._es.clear_scroll(
-                body={'scroll_id': [self._scroll_id]},
+                body={'scroll_id': scroll_ids},
                 ignore=404,
             )
 
     def _update_state(self, resp):
-        self._hits = resp['hits']['hits']
+        if not isinstance(resp, SearchResponseStream):
+            super()._update_state(resp)
+            self._scroll_id = resp.get('_scroll_id')
+            return
+
+        # hits are read by `_read_stream`, the page is known to be
+        # the last one only when it turns out to be empty
+        self._stream = resp
+        self._stream_hits = 0
+        self._hits = []
         self._hits_idx = 0
-        self._scroll_id = resp.get('_scroll_id')
         self._successful_shards = resp['_shards']['successful']
         self._total_shards = resp['_shards']['total']
-        self._done = not self._hits or self._scroll_id is None
+        self._scroll_id = resp.get('_scroll_id')
+        self._done = False
+
+    async def _read_stream(self):
+        if self._stream is None:
+            return False
+
+        hits = await self._stream.read_hits()
+
+        if hits:
+            self._hits = hits
+            self._hits_idx = 0
+            self._stream_hits += len(hits)
+            return True
+
+        self._stream = None
+        self._cursor = self._scroll_id if self._stream_hits else None
+        self._done = self._cursor is None
+        return False
+
+
+def _with_stream_param(kwargs):
+    kwargs = kwargs.copy()
+    kwargs['params'] = dict(kwargs.get('params') or {}, stream=True)
+    return kwargs
+
+
+class PointInTimeScan(_PagedScan):
+    """
+    Page through search results with ``search_after`` over a point in
+    time instead of a scroll context.
+
+    The point in time is opened on ``index`` when entering the context
+    manager, kept alive for ``keep_alive`` by every page request and
+    closed on exit. Results are sorted by ``_shard_doc`` unless the query
+    defines its own sort. Requires elasticsearch 7.12+.
+    """
+
+    def __init__(
+        self,
+        es,
+        index,
+        query=None,
+        keep_alive='5m',
+        raise_on_error=True,
+        size=1000,
+        prefetch=0,
+        **kwargs
+    ):
+        super().__init__(
+            es,
+            raise_on_error=raise_on_error,
+            size=size,
+            prefetch=prefetch,
+        )
+
+        query = query.copy() if query else {}
+        query.setdefault('sort', ['_shard_doc'])
+        self._query = query
+        self._index = index
+        self._keep_alive = keep_alive
+        self._kwargs = kwargs
+
+        self._pit_id = None
+
+    @property
+    def pit_id(self):
+        if self._initial:
+            raise RuntimeError("Scan operations should be done "
+                               "inside async context manager")
+
+        return self._pit_id
+
+    def _context_id(self):
+        return self._pit_id
+
+    async def _fetch_first_page(self):
+        try:
+            resp = await self._es.transport.perform_request(
+                'POST',
+                _make_path(self._index, '_pit'),
+                params={'keep_alive': self._keep_alive},
+            )
+        except NotFoundError:
+            return None
+
+        self._pit_id = resp['id']
+
+        return await self._fetch_page(None)
+
+    async def _fetch_page(self, cursor):
+        body = self._query.copy()
+        body['pit'] = {'id': self._pit_id, 'keep_alive': self._keep_alive}
+
+        if cursor is not None:
+            body['search_after'] = cursor
+            # total is only reported by the first page
+            body['track_total_hits'] = False
+
+        resp = await self._es.search(
+            body=body,
+            size=self._size,
+            **self._kwargs
+        )
+        self._pit_id = resp.get('pit_id', self._pit_id)
+
+        return resp
+
+    def _next_cursor(self, resp):
+        hits = resp['hits']['hits']
+
+        # short page is the last one, don't waste a request on it
+        if len(hits) < self._size:
+            return None
+        return hits[-1]['sort']
+
+    async def _do_close(self):
+        if self._pit_id is not None:
+            await self._es.transport.perform_request(
+                'DELETE',
+                '/_pit',
+                body={'id': self._pit_id},
+                params={'ignore': 404},
+            )
+
+
+class SlicedScan:
+    """
+    Split the scroll into ``slices`` independent scroll contexts with
+    the ``slice`` clause, scroll them concurrently and merge the hits
+    into a single async iterator.
+
+    Accepts the same arguments as :class:`Scan`, which is used for every
+    slice, so ``raise_on_error`` and ``clear_scroll`` apply to each of them.
+    """
+
+    def __init__(
+        self,
+        es,
+        query=None,
+        slices=2,
+        queue_size=1000,
+        **kwargs
+    ):
+        self._loop = es.loop
+
+        self._scans = []
+        for slice_id in range(slices):
+            slice_query = query.copy() if query else {}
+            slice_query['slice'] = {'id': slice_id, 'max': slices}
+
+            self._scans.append(Scan(es, query=slice_query, **kwargs))
+
+        self._queue = asyncio.Queue(queue_size, loop=self._loop)
+        self._tasks = []
+        self._running = 0
+
+        self._initial = True
+
+    async def __aenter__(self):  # noqa
+        self._initial = False
+
+        results = await asyncio.gather(
+            *[scan.__aenter__() for scan in self._scans],
+            loop=self._loop,
+            return_exceptions=True
+        )
+
+        for result in results:
+            if isinstance(result, Exception):
+                await self._close_scans()
+                raise result
+
+        self._tasks = [
+            asyncio.ensure_future(self._do_scan(scan), loop=self._loop)
+            for scan in self._scans
+        ]
+        self._running = len(self._tasks)
+
+        return self
+
+    async def __aexit__(self, *exc_info):  # noqa
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(
+            *self._tasks,
+            loop=self._loop,
+            return_exceptions=True
+        )
+
+        await self._close_scans(*exc_info)
+
+    def __aiter__(self):
+        if self._initial:
+            raise RuntimeError("Scan operations should be done "
+                               "inside async context manager")
+        return self
+
+    async def __anext__(self):  # noqa
+        while self._running:
+            item = await self._queue.get()
+
+            if item is None:
+                # slice is exhausted
+                self._running -= 1
+            elif isinstance(item, Exception):
+                self._running = 0
+                raise item
+            else:
+                return item
+
+        raise StopAsyncIteration
+
+    @property
+    def scroll_ids(self):
+        if self._initial:
+            raise RuntimeError("Scan operations should be done "
+                               "inside async context manager")
+
+        return [scan.scroll_id for scan in self._scans]
+
+    @property
+    def total(self):
+        if self._initial:
+            raise RuntimeError("Scan operations should be done "
+                               "inside async context manager")
+
+        totals = [scan.total for scan in self._scans]
+
+        if not any(isinstance(total, dict) for total in totals):
+            return sum(totals)
+
+        # elasticsearch 7.x reports ``{'value': ..., 'relation': ...}``,
+        # slices of a missing index report plain ``0``
+        totals = [
+            total if isinstance(total, dict)
+            else {'value': total, 'relation': 'eq'}
+            for total in totals
+        ]
+
+        return {
+            'value': sum(total['value'] for total in totals),
+            'relation': (
+                'eq' if all(total['relation'] == 'eq' for total in totals)
+                else 'gte'
+            ),
+        }
+
+    async def _do_scan(self, scan):
+        try:
+            async for hit in scan:
+                await self._queue.put(hit)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await self._queue.put(exc)
+        else:
+            await self._queue.put(None)
+
+    async def _close_scans(self, *exc_info):
+        # cancels prefetching, releases streams and clears the scrolls
+        await asyncio.gather(
+            *[scan.__aexit__(*exc_info) for scan in self._scans],
+            loop=self._loop
+        )
+
+
+def _aiter(iterable):
+    if hasattr(iterable, '__aiter__'):
+        return iterable.__aiter__()
+    return _SyncIterator(iterable)
+
+
+class _SyncIterator:
+
+    def __init__(self, iterable):
+        self._it = iter(iterable)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):  # noqa
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _ChunkedActions:
+    """
+    Split actions into chunks by number or size, serialize them into strings
+    in the process. Only one chunk is held in memory at a time.
+    """
+
+    def __init__(
+        self,
+        actions,
+        chunk_size,
+        max_chunk_bytes,
+        serializer,
+        expand_action_callback=expand_action,
+    ):
+        self._actions = _aiter(actions)
+        self._chunk_size = chunk_size
+        self._max_chunk_bytes = max_chunk_bytes
+        self._serializer = serializer
+        self._expand_action_callback = expand_action_callback
+
+        # serialized action which didn't fit into the previous chunk
+        self._pending = None
+        self._done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):  # noqa
+        bulk_actions, bulk_data = [], []
+        size, action_count = 0, 0
+
+        while action_count < self._chunk_size:
+            if self._pending is not None:
+                item, self._pending = self._pending, None
+            elif self._done:
+                break
+            else:
+                try:
+                    data = await self._actions.__anext__()
+                except StopAsyncIteration:
+                    self._done = True
+                    break
+                item = self._serialize(*self._expand_action_callback(data))
+
+            lines, raw, cur_size = item
+
+            # full chunk, send it and keep the action for the next one
+            if bulk_actions and size + cur_size > self._max_chunk_bytes:
+                self._pending = item
+                break
+
+            bulk_actions.extend(lines)
+            bulk_data.append(raw)
+            size += cur_size
+            action_count += 1
+
+        if not bulk_actions:
+            raise StopAsyncIteration
+
+        return bulk_data, bulk_actions
+
+    def _serialize(self, action, data):
+        lines = [self._serializer.dumps(action)]
+        raw = (action, )
+
+        if data is not None:
+            lines.append(self._serializer.dumps(data))
+            raw = (action, data)
+
+        # +1 to account for the trailing new line character
+        cur_size = sum(len(line.encode('utf-8')) + 1 for line in lines)
+
+        return lines, raw, cur_size
+
+
+async def _process_bulk_chunk(
+    es,
+    bulk_actions,
+    bulk_data,
+    raise_on_exception=True,
+    raise_on_error=True,
+    **kwargs
+):
+    """
+    Send a bulk request to elasticsearch and process the output.
+
+    Returns a list of ``(ok, item)`` results and a list of errors which
+    should be raised as ``BulkIndexError`` once the results are consumed.
+    """
+    results = []
+    # if raise on error is set, we need to collect errors per chunk
+    # before raising them
+    errors = []
+
+    try:
+        resp = await es.bulk('\n'.join(bulk_actions) + '\n', **kwargs)
+    except TransportError as exc:
+        if raise_on_exception:
+            raise
+
+        # if we are not propagating, mark all actions in chunk as failed
+        err_message = str(exc)
+
+        for data in bulk_data:
+            op_type, action = data[0].copy().popitem()
+            info = {
+                'error': err_message,
+                'status': exc.status_code,
+                'exception': exc,
+            }
+            if op_type != 'delete':
+                info['data'] = data[1]
+            info.update(action)
+
+            if raise_on_error:
+                errors.append({op_type: info})
+            else:
+                results.append((False, {op_type: info}))
+
+        return results, errors
+
+    # go through request-response pairs and detect failures
+    for data, (op_type, item) in zip(
+        bulk_data,
+        map(methodcaller('popitem'), resp['items']),
+    ):
+        ok = 200 <= item.get('status', 500) < 300
+
+        if not ok and raise_on_error:
+            # include original document source
+            if len(data) > 1:
+                item['data'] = data[1]
+            errors.append({op_type: item})
+
+        if ok or not errors:
+            # if we are not just recording all errors to be able to raise
+            # them all at once, return items individually
+            results.append((ok, {op_type: item}))
+
+    return results, errors
+
+
+class _StreamingBulk:
+
+    def __init__(
+        self,
+        es,
+        actions,
+        chunk_size=500,
+        max_chunk_bytes=100 * 1024 * 1024,
+        raise_on_error=True,
+        expand_action_callback=expand_action,
+        raise_on_exception=True,
+        max_retries=0,
+        initial_backoff=2,
+        max_backoff=600,
+        yield_ok=True,
+        **kwargs
+    ):
+        self._es = es
+        self._chunks = _ChunkedActions(
+            actions,
+            chunk_size,
+            max_chunk_bytes,
+            es.transport.serializer,
+            expand_action_callback,
+        )
+        self._raise_on_error = raise_on_error
+        self._raise_on_exception = raise_on_exception
+        self._max_retries = max_retries
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._yield_ok = yield_ok
+        self._kwargs = kwargs
+
+        self._results = collections.deque()
+        self._errors = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):  # noqa
+        while not self._results:
+            if self._errors:
+                errors, self._errors = self._errors, []
+                raise BulkIndexError(
+                    '%i document(s) failed to index.' % len(errors),
+                    errors,
+                )
+
+            bulk_data, bulk_actions = await self._chunks.__anext__()
+
+            await self._process_chunk(bulk_data, bulk_actions)
+
+        return self._results.popleft()
+
+    async def _process_chunk(self, bulk_data, bulk_actions):
+        serializer = self._es.transport.serializer
+
+        for attempt in range(self._max_retries + 1):
+            to_retry, to_retry_data = [], []
+
+            if attempt:
+                await asyncio.sleep(
+                    min(
+                        self._max_backoff,
+                        self._initial_backoff * 2 ** (attempt - 1),
+                    ),
+                    loop=self._es.loop,
+                )
+
+            try:
+                results, errors = await _process_bulk_chunk(
+                    self._es,
+                    bulk_actions,
+                    bulk_data,
+                    self._raise_on_exception,
+                    self._raise_on_error,
+                    **self._kwargs
+                )
+            except TransportError as exc:
+                # suppress 429 errors since we will retry them
+                if attempt == self._max_retries or exc.status_code != 429:
+                    raise
+                continue
+
+            for data, (ok, info) in zip(bulk_data, results):
+                if not ok:
+                    op_type, info = info.popitem()
+                    # retry if retries enabled, we get 429,
+                    # and we are not in the last attempt
+                    if (
+                        self._max_retries and
+                        info['status'] == 429 and
+                        attempt < self._max_retries
+                    ):
+                        to_retry.extend(map(serializer.dumps, data))
+                        to_retry_data.append(data)
+                    else:
+                        self._results.append((ok, {op_type: info}))
+                elif self._yield_ok:
+                    self._results.append((ok, info))
+
+            self._errors = errors
+
+            if not to_retry:
+                break
+
+            # retry only subset of documents that didn't succeed
+            bulk_actions, bulk_data = to_retry, to_retry_data
+
+
+def streaming_bulk(es, actions, **kwargs):
+    """
+    Consume actions from the sync or async iterable passed in and
+    send them to elasticsearch in chunks.
+
+    Returns an async iterator yielding ``(ok, item)`` results per action
+    as soon as the response for its chunk arrives. Accepts the same
+    arguments as :func:`elasticsearch.helpers.streaming_bulk`, waiting
+    with ``asyncio.sleep`` between retries of ``429`` rejections.
+    """
+    return _StreamingBulk(es, actions, **kwargs)
+
+
+async def bulk(es, actions, stats_only=False, **kwargs):
+    """
+    Send actions to elasticsearch in chunks and return a tuple with
+    the number of successfully executed actions and either a list of
+    errors or number of errors if ``stats_only`` is set to ``True``.
+
+    Any additional keyword arguments are passed to :func:`streaming_bulk`.
+    """
+    # make streaming_bulk yield successful results so we can count them
+    kwargs['yield_ok'] = True
+
+    return await _summarize(streaming_bulk(es, actions, **kwargs), stats_only)
+
+
+async def _summarize(results, stats_only):
+    success, failed = 0, 0
+
+    # list of errors to be collected is not stats_only
+    errors = []
+
+    async for ok, item in results:
+        if not ok:
+            if not stats_only:
+                errors.append(item)
+            failed += 1
+        else:
+            success += 1
+
+    return success, failed if stats_only else errors
+
+
+class _ParallelBulk:
+
+    def __init__(
+        self,
+        es,
+        actions,
+        concurrency=4,
+        chunk_size=500,
+        max_chunk_bytes=100 * 1024 * 1024,
+        queue_size=4,
+        expand_action_callback=expand_action,
+        **kwargs
+    ):
+        self._es = es
+        self._loop = es.loop
+        self._chunks = _ChunkedActions(
+            actions,
+            chunk_size,
+            max_chunk_bytes,
+            es.transport.serializer,
+            expand_action_callback,
+        )
+        self._concurrency = concurrency
+        self._kwargs = kwargs
+
+        # a fast producer blocks here instead of piling up chunks in memory
+        self._chunk_queue = asyncio.Queue(queue_size, loop=self._loop)
+        # a slow consumer blocks the workers the same way
+        self._result_queue = asyncio.Queue(concurrency, loop=self._loop)
+
+        self._tasks = None
+        self._running = 0
+
+        self._results = collections.deque()
+        self._errors = []
+
+    async def __aenter__(self):  # noqa
+        return self
+
+    async def __aexit__(self, *exc_info):  # noqa
+        await self.aclose()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):  # noqa
+        if self._tasks is None:
+            self._start()
+
+        while not self._results:
+            if self._errors:
+                errors, self._errors = self._errors, []
+                await self._cancel()
+                raise BulkIndexError(
+                    '%i document(s) failed to index.' % len(errors),
+                    errors,
+                )
+
+            if not self._running:
+                raise StopAsyncIteration
+
+            item = await self._result_queue.get()
+
+            if item is None:
+                # worker is finished
+                self._running -= 1
+            elif isinstance(item, Exception):
+                await self._cancel()
+                raise item
+            else:
+                results, self._errors = item
+                self._results.extend(results)
+
+        return self._results.popleft()
+
+    def _start(self):
+        self._tasks = [
+            asyncio.ensure_future(self._produce(), loop=self._loop),
+        ]
+
+        for _ in range(self._concurrency):
+            self._tasks.append(
+                asyncio.ensure_future(self._work(), loop=self._loop),
+            )
+
+        self._running = self._concurrency
+
+    async def aclose(self):
+        """Cancel the requests in flight and stop reading the actions."""
+        if self._tasks is None:
+            self._tasks = []
+
+        self._results.clear()
+        self._errors = []
+
+        await self._cancel()
+
+    async def _cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(
+            *self._tasks,
+            loop=self._loop,
+            return_exceptions=True
+        )
+
+        self._running = 0
+
+    async def _produce(self):
+        try:
+            async for chunk in self._chunks:
+                await self._chunk_queue.put(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await self._result_queue.put(exc)
+            return
+
+        for _ in range(self._concurrency):
+            await self._chunk_queue.put(None)
+
+    async def _work(self):
+        while True:
+            chunk = await self._chunk_queue.get()
+
+            if chunk is None:
+                await self._result_queue.put(None)
+                return
+
+            bulk_data, bulk_actions = chunk
+
+            try:
+                item = await _process_bulk_chunk(
+                    self._es,
+                    bulk_actions,
+                    bulk_data,
+                    **self._kwargs
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                item = exc
+
+            await self._result_queue.put(item)
+
+
+def parallel_bulk(es, actions, **kwargs):
+    """
+    Send chunks of actions to elasticsearch keeping up to ``concurrency``
+    bulk requests in flight at once.
+
+    Returns an async iterator yielding ``(ok, item)`` results per action,
+    chunks are reported in completion order. At most ``queue_size`` chunks
+    are buffered ahead of the workers, a fast producer waits for free slots
+    instead of reading the whole input into memory. Remaining requests are
+    cancelled on the first error.
+
+    Use it as an async context manager, or call ``aclose()``, to cancel the
+    requests when the iteration is left early.
+    """
+    return _ParallelBulk(es, actions, **kwargs)
+
+
+class _ReindexActions:
+
+    def __init__(self, scan, target_index, transform=None):
+        self._scan = scan
+        self._target_index = target_index
+        self._transform = transform
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):  # noqa
+        while True:
+            hit = await self._scan.__anext__()
+
+            hit['_index'] = self._target_index
+            if 'fields' in hit:
+                hit.update(hit.pop('fields'))
+
+            if self._transform is None:
+                return hit
+
+            action = self._transform(hit)
+            if inspect.isawaitable(action):
+                action = await action
+
+            # transform drops the document by returning None
+            if action is not None:
+                return action
+
+
+async def reindex(
+    es,
+    source_index,
+    target_index,
+    query=None,
+    target_es=None,
+    chunk_size=500,
+    scroll='5m',
+    transform=None,
+    scan_kwargs=None,
+    bulk_kwargs=None,
+):
+    """
+    Reindex all documents matching ``query`` from ``source_index`` into
+    ``target_index``, possibly on another cluster given by ``target_es``.
+
+    Documents are streamed from :class:`Scan` into :func:`parallel_bulk`
+    so only a bounded number of pages and chunks is held in memory.
+    ``transform`` is called (or awaited) with every hit after its
+    ``_index`` is replaced and returns the action to index, or ``None``
+    to skip the document. Returns a tuple with the number of successful
+    and failed actions.
+
+    ``scan_kwargs`` are passed to :class:`Scan` and ``bulk_kwargs``
+    to :func:`parallel_bulk`, e.g. ``prefetch`` and ``concurrency``.
+    """
+    if target_es is None:
+        target_es = es
+
+    async with Scan(
+        es,
+        query=query,
+        index=source_index,
+        scroll=scroll,
+        **(scan_kwargs or {})
+    ) as scan:
+        actions = _ReindexActions(scan, target_index, transform)
+
+        async with parallel_bulk(
+            target_es,
+            actions,
+            chunk_size=chunk_size,
+            **(bulk_kwargs or {})
+        ) as results:
+            return await _summarize(results, stats_only=True)
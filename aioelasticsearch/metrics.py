@@ -0,0 +1,307 @@
+import bisect
+import collections
+
+__all__ = ('DEFAULT_BUCKETS', 'Histogram', 'TransportMetrics', 'endpoint')
+
+
+DEFAULT_BUCKETS = (
+    .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# path segments naming an api rather than an index, id, etc.
+_API_SEGMENTS = frozenset([
+    'aliases', 'allocation', 'count', 'fielddata', 'health', 'hot_threads',
+    'http', 'indices', 'info', 'master', 'nodes', 'pending_tasks', 'plugins',
+    'recovery', 'repositories', 'scroll', 'segments', 'settings', 'shards',
+    'snapshots', 'state', 'stats', 'tasks', 'templates', 'thread_pool',
+    'usage',
+])
+
+# path segments followed by a document or scroll id, which may start with _
+_ID_SEGMENTS = frozenset([
+    '_create', '_doc', '_explain', '_source', '_termvectors', '_update',
+    'scroll',
+])
+
+
+def endpoint(method, path):
+    """
+    Return the logical endpoint of a request, e.g. ``GET /*/_search``.
+
+    Index names, document ids and other path parameters are replaced
+    with ``*`` to keep the number of endpoints bounded.
+    """
+    segments = []
+    previous = None
+
+    for segment in path.split('?', 1)[0].strip('/').split('/'):
+        if not segment:
+            continue
+
+        if previous in _ID_SEGMENTS or not (
+            segment.startswith('_') or segment in _API_SEGMENTS
+        ):
+            segments.append('*')
+        else:
+            segments.append(segment)
+
+        previous = segment
+
+    return '{} /{}'.format(method, '/'.join(segments))
+
+
+class Histogram:
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # the last one counts values above all the buckets
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Return the ``q`` quantile interpolated linearly within the bucket
+        holding it, the highest bound if it's above all of them, ``None``
+        without values.
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        lower, below = 0., 0
+        for bound, count in self.cumulative():
+            if count >= rank:
+                break
+            lower, below = bound, count
+
+        if bound == float('inf'):
+            return self.buckets[-1] if self.buckets else None
+
+        # the rank falls on an empty bucket, e.g. with q=0
+        if count == below:
+            return lower
+
+        return lower + (bound - lower) * (rank - below) / (count - below)
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': self.cumulative(),
+        }
+
+    def cumulative(self):
+        """Return ``(upper bound, count)`` pairs ending with ``+Inf``."""
+        ret = []
+        count = 0
+        for bound, n in zip(self.buckets + (float('inf'), ), self.counts):
+            count += n
+            ret.append((bound, count))
+        return ret
+
+
+class _Series:
+
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.phases = collections.defaultdict(lambda: Histogram(buckets))
+        self.statuses = collections.Counter()
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+class TransportMetrics:
+    """
+    Client side request metrics keyed by node and endpoint.
+
+    Latency histograms, response statuses, retries, bytes sent and bytes
+    received are collected for every ``(node, endpoint)`` pair. Requests
+    failed without a response are counted with ``'N/A'`` or ``'TIMEOUT'``
+    status like ``TransportError.status_code``. Bodies of streamed
+    responses aren't counted as received. Latencies of request phases
+    are collected for connections with ``trace_requests`` enabled.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._series = {}
+        # latency of every endpoint over all the nodes for `quantile()`
+        self._latency = {}
+
+    def _get_series(self, node, endpoint_):
+        key = (node, endpoint_)
+
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(self.buckets)
+
+        return series
+
+    def observe_request(
+        self,
+        node,
+        method,
+        path,
+        status,
+        duration,
+        bytes_sent=0,
+        bytes_received=0,
+        phases=None,
+    ):
+        endpoint_ = endpoint(method, path)
+        series = self._get_series(node, endpoint_)
+
+        series.latency.observe(duration)
+
+        latency = self._latency.get(endpoint_)
+        if latency is None:
+            latency = self._latency[endpoint_] = Histogram(self.buckets)
+        latency.observe(duration)
+        series.statuses[status] += 1
+        series.bytes_sent += bytes_sent
+        series.bytes_received += bytes_received
+
+        if phases:
+            for phase, phase_duration in phases.items():
+                series.phases[phase].observe(phase_duration)
+
+    def observe_retry(self, node, method, path):
+        self._get_series(node, endpoint(method, path)).retries += 1
+
+    def quantile(self, method, path, q):
+        """
+        Return the ``q`` quantile of latency of the endpoint over all
+        the nodes, see ``Histogram.quantile()``.
+        """
+        latency = self._latency.get(endpoint(method, path))
+        if latency is None:
+            return None
+
+        return latency.quantile(q)
+
+    def reset(self):
+        self._series.clear()
+        self._latency.clear()
+
+    def snapshot(self):
+        """Return the collected metrics as a list of dicts."""
+        ret = []
+
+        for (node, endpoint_), series in sorted(self._series.items()):
+            ret.append({
+                'node': node,
+                'endpoint': endpoint_,
+                'requests': series.latency.count,
+                'statuses': dict(series.statuses),
+                'retries': series.retries,
+                'bytes_sent': series.bytes_sent,
+                'bytes_received': series.bytes_received,
+                'latency': series.latency.snapshot(),
+                'phases': {
+                    phase: histogram.snapshot()
+                    for phase, histogram in series.phases.items()
+                },
+            })
+
+        return ret
+
+    def to_prometheus(self, namespace='elasticsearch_client'):
+        """Render the metrics in the Prometheus text exposition format."""
+        duration = namespace + '_request_duration_seconds'
+        phase_duration = namespace + '_request_phase_duration_seconds'
+        requests = namespace + '_requests_total'
+        retries = namespace + '_retries_total'
+        sent = namespace + '_request_bytes_total'
+        received = namespace + '_response_bytes_total'
+
+        samples = collections.defaultdict(list)
+
+        for (node, endpoint_), series in sorted(self._series.items()):
+            labels = (('node', node), ('endpoint', endpoint_))
+
+            samples[duration].extend(
+                _histogram_samples(duration, series.latency, labels),
+            )
+
+            for phase, histogram in sorted(series.phases.items()):
+                samples[phase_duration].extend(_histogram_samples(
+                    phase_duration, histogram, labels + (('phase', phase), ),
+                ))
+
+            for status, count in sorted(
+                series.statuses.items(), key=lambda item: str(item[0]),
+            ):
+                samples[requests].append(_sample(
+                    requests, count, labels + (('status', status), ),
+                ))
+
+            for name, value in (
+                (retries, series.retries),
+                (sent, series.bytes_sent),
+                (received, series.bytes_received),
+            ):
+                samples[name].append(_sample(name, value, labels))
+
+        lines = []
+        for name, type_, help_ in (
+            (duration, 'histogram', 'Request latency in seconds.'),
+            (phase_duration, 'histogram',
+             'Request phase latency in seconds.'),
+            (requests, 'counter', 'Requests by response status.'),
+            (retries, 'counter', 'Requests retried on another connection.'),
+            (sent, 'counter', 'Bytes of request bodies sent.'),
+            (received, 'counter', 'Bytes of response bodies received.'),
+        ):
+            lines.append('# HELP {} {}'.format(name, help_))
+            lines.append('# TYPE {} {}'.format(name, type_))
+            lines.extend(samples[name])
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+
+def _histogram_samples(name, histogram, labels):
+    ret = [
+        _sample(name + '_bucket', count, labels + (('le', bound), ))
+        for bound, count in histogram.cumulative()
+    ]
+    ret.append(_sample(name + '_sum', histogram.sum, labels))
+    ret.append(_sample(name + '_count', histogram.count, labels))
+    return ret
+
+
+def _sample(name, value, labels):
+    return '{}{{{}}} {}'.format(
+        name,
+        ','.join(
+            '{}="{}"'.format(
+                label,
+                _format_value(label_value)
+                .replace('\\', '\\\\')
+                .replace('\n', '\\n')
+                .replace('"', '\\"'),
+            )
+            for label, label_value in labels
+        ),
+        _format_value(value),
+    )
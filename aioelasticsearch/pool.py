@@ -1,15 +1,125 @@
 import asyncio
 import collections
+import itertools
 import logging
 import random
 
-from elasticsearch.connection_pool import RoundRobinSelector
+from elasticsearch.connection_pool import (ConnectionSelector,
+                                           RoundRobinSelector)
 
-from .exceptions import ImproperlyConfigured
+from .exceptions import ConnectionError, ImproperlyConfigured, TransportError
 
 logger = logging.getLogger('elasticsearch')
 
 
+class LeastOutstandingSelector(ConnectionSelector):
+    """
+    Select the connection with the fewest requests in flight.
+    """
+
+    def select(self, connections):
+        # random tie breaking spreads the load of an idle pool
+        return min(
+            connections,
+            key=lambda connection: (connection.in_flight, random.random()),
+        )
+
+
+class EWMASelector(ConnectionSelector):
+    """
+    Select the connection with the lowest latency EWMA weighted by the
+    requests in flight, idle connections without latency yet go first.
+
+    Weighting by load keeps all the requests from piling up on the fastest
+    node until its latency catches up.
+    """
+
+    def select(self, connections):
+        return min(connections, key=_ewma_cost)
+
+
+class PowerOfTwoChoicesSelector(ConnectionSelector):
+    """
+    Select the less loaded of two random connections, by requests in flight
+    and then by latency EWMA.
+    """
+
+    def select(self, connections):
+        if len(connections) == 1:
+            return connections[0]
+
+        first, second = random.sample(connections, 2)
+
+        if _load(second) < _load(first):
+            return second
+        return first
+
+
+class ZoneAwareSelector(ConnectionSelector):
+    """
+    Prefer connections to nodes with ``attribute`` equal to ``zone``.
+
+    Other nodes are selected only when all the local ones are dead or
+    have ``max_in_flight`` requests in flight. The attribute is looked up
+    in ``attributes`` of the host dict, filled from sniffed node info or
+    passed with hosts explicitly. Configure it with ``functools.partial``::
+
+        selector_class=partial(ZoneAwareSelector, zone='us-east-1a')
+    """
+
+    def __init__(
+        self,
+        opts,
+        zone,
+        attribute='zone',
+        max_in_flight=None,
+        selector_class=RoundRobinSelector,
+    ):
+        super().__init__(opts)
+
+        self.zone = zone
+        self.attribute = attribute
+        self.max_in_flight = max_in_flight
+        self.selector = selector_class(opts)
+
+        self.local = {
+            connection for connection, host in opts.items()
+            if host.get('attributes', {}).get(attribute) == zone
+        }
+
+    def select(self, connections):
+        available = connections
+
+        if self.max_in_flight is not None:
+            available = [
+                connection for connection in connections
+                if connection.in_flight < self.max_in_flight
+            ]
+
+        local = [
+            connection for connection in available
+            if connection in self.local
+        ]
+
+        return self.selector.select(local or available or connections)
+
+
+def _ewma_cost(connection):
+    latency = connection.latency_ewma
+
+    if latency is None:
+        # probe nodes without latency yet one request at a time
+        cost = float('inf') if connection.in_flight else float('-inf')
+    else:
+        cost = latency * (connection.in_flight + 1)
+
+    return (cost, random.random())
+
+
+def _load(connection):
+    return (connection.in_flight, connection.latency_ewma or 0)
+
+
 class AIOHttpConnectionPool:
 
     def __init__(
@@ -19,17 +129,23 @@ class AIOHttpConnectionPool:
         timeout_cutoff=5,
         selector_class=RoundRobinSelector,
         randomize_hosts=True,
+        health_check=False,
         *,
         loop,
         **kwargs
     ):
         self._dead_timeout = dead_timeout
+        # dead connections are resurrected by `ping_dead()` only
+        self.health_check = health_check
         self.timeout_cutoff = timeout_cutoff
         self.connection_opts = connections
         self.connections = [c for (c, _) in connections]
         self.orig_connections = set(self.connections)
+        # (timestamp, sequence number, connection), the number breaks ties
+        # as connections aren't comparable
         self.dead = asyncio.PriorityQueue(len(self.connections), loop=loop)
         self.dead_count = collections.Counter()
+        self._dead_seq = itertools.count()
 
         self.loop = loop
 
@@ -51,19 +167,25 @@ class AIOHttpConnectionPool:
             # connection not alive or marked already, ignore
             return
         else:
-            self.dead_count[connection] += 1
-            dead_count = self.dead_count[connection]
+            self._put_dead(connection, now)
 
-            timeout = self.dead_timeout(dead_count)
+    def _put_dead(self, connection, now):
+        self.dead_count[connection] += 1
+        dead_count = self.dead_count[connection]
 
-            # it is impossible to raise QueueFull here
-            self.dead.put_nowait((now + timeout, connection))
+        timeout = self.dead_timeout(dead_count)
 
-            logger.warning(
-                'Connection %r has failed for %i times in a row, '
-                'putting on %i second timeout.',
-                connection, dead_count, timeout,
-            )
+        # it is impossible to raise QueueFull here
+        self._put_dead_entry(now + timeout, connection)
+
+        logger.warning(
+            'Connection %r has failed for %i times in a row, '
+            'putting on %i second timeout.',
+            connection, dead_count, timeout,
+        )
+
+    def _put_dead_entry(self, timestamp, connection):
+        self.dead.put_nowait((timestamp, next(self._dead_seq), connection))
 
     def mark_live(self, connection):
         del self.dead_count[connection]
@@ -75,11 +197,11 @@ class AIOHttpConnectionPool:
                 return random.choice(list(self.orig_connections))
             return
 
-        timestamp, connection = self.dead.get_nowait()
+        timestamp, _, connection = self.dead.get_nowait()
 
         if not force and timestamp > self.loop.time():
             # return it back if not eligible and not forced
-            self.dead.put_nowait((timestamp, connection))
+            self._put_dead_entry(timestamp, connection)
             return
 
         # either we were forced or the connection is elligible to be retried
@@ -92,8 +214,76 @@ class AIOHttpConnectionPool:
 
         return connection
 
+    async def ping_dead(self, timeout=None, force=False):
+        """
+        Ping the dead connections due to be retried, or all of them with
+        ``force``, with a ``HEAD /`` request and resurrect the ones which
+        responded. The others are put on a longer timeout, unless forced
+        before their timeout passed.
+
+        Return seconds until the next dead connection is due, ``None`` if
+        there are none.
+        """
+        now = self.loop.time()
+        due = []
+
+        while not self.dead.empty():
+            timestamp, _, connection = self.dead.get_nowait()
+
+            if not force and timestamp > now:
+                self._put_dead_entry(timestamp, connection)
+                break
+
+            due.append((timestamp, connection))
+
+        alive = await asyncio.gather(
+            *[self._ping(connection, timeout) for _, connection in due],
+            loop=self.loop
+        )
+
+        now = self.loop.time()
+
+        for (timestamp, connection), ok in zip(due, alive):
+            if ok:
+                self.connections.append(connection)
+                self.mark_live(connection)
+
+                logger.info(
+                    'Resurrecting connection %r after a successful ping.',
+                    connection,
+                )
+            elif timestamp > now:
+                # forced early, keep the backoff schedule
+                self._put_dead_entry(timestamp, connection)
+            else:
+                self._put_dead(connection, now)
+
+        return self.next_ping_delay()
+
+    async def _ping(self, connection, timeout):
+        try:
+            await connection.perform_request('HEAD', '/', timeout=timeout)
+        except TransportError:
+            return False
+
+        return True
+
+    def next_ping_delay(self):
+        if self.dead.empty():
+            return None
+
+        # peek at the one due first
+        timestamp, _, connection = self.dead.get_nowait()
+        self._put_dead_entry(timestamp, connection)
+
+        return max(timestamp - self.loop.time(), 0)
+
     def get_connection(self):
-        self.resurrect()
+        if self.health_check:
+            if not self.connections:
+                raise ConnectionError('N/A', 'No live connections.', None)
+        else:
+            self.resurrect()
 
         if not self.connections:
             conn = self.resurrect(force=True)
@@ -105,6 +295,30 @@ class AIOHttpConnectionPool:
 
         return self.connections[0]
 
+    def get_other_connection(self, connection):
+        """
+        Return a live connection other than ``connection``, ``None`` if
+        there is none.
+        """
+        connections = [c for c in self.connections if c is not connection]
+
+        if not connections:
+            return None
+
+        if len(connections) > 1:
+            return self.selector.select(connections)
+
+        return connections[0]
+
+    async def warmup(self, count=1, timeout=None, *, skip=frozenset()):
+        """Warm up all the connections, dead ones included."""
+        coros = [
+            connection.warmup(count, timeout) for connection in
+            self.orig_connections - skip
+        ]
+
+        await asyncio.gather(*coros, loop=self.loop)
+
     async def close(self, *, skip=frozenset()):
         coros = [
             connection.close() for connection in
@@ -132,6 +346,9 @@ class DummyConnectionPool(AIOHttpConnectionPool):
     def get_connection(self):
         return self.connection
 
+    def get_other_connection(self, connection):
+        return None
+
     async def close(self, *, skip=frozenset()):
         if self.connection in skip:
             return
@@ -145,3 +362,9 @@ class DummyConnectionPool(AIOHttpConnectionPool):
 
     def resurrect(self, force=False):
         pass
+
+    async def ping_dead(self, timeout=None, force=False):
+        return None
+
+    def next_ping_delay(self):
+        return None
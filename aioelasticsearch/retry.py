@@ -0,0 +1,52 @@
+import random
+
+__all__ = ('RetryBudget', 'backoff')
+
+
+def backoff(attempt, base, cap):
+    """
+    Return a random delay before retrying after ``attempt``, full jitter
+    of the exponential backoff ``base * 2 ** (attempt - 1)`` capped at
+    ``cap`` seconds.
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class RetryBudget:
+    """
+    Token bucket capping retries at ``ratio`` of successful requests.
+
+    Every successful request deposits ``ratio`` of a token and every retry
+    withdraws one. ``min_per_second`` tokens are deposited each second to
+    let clients with little traffic retry, the bucket holds at most
+    ``max_tokens`` and starts full.
+    """
+
+    def __init__(self, ratio=.2, min_per_second=1, max_tokens=10, *, loop):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+        self.loop = loop
+        self._refilled_at = loop.time()
+
+    def _refill(self, tokens):
+        now = self.loop.time()
+        tokens += (now - self._refilled_at) * self.min_per_second
+        self._refilled_at = now
+
+        self.tokens = min(self.tokens + tokens, self.max_tokens)
+
+    def deposit(self):
+        self._refill(self.ratio)
+
+    def withdraw(self):
+        """Take a token for a retry, return ``False`` if there is none."""
+        self._refill(0)
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
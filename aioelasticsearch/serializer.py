@@ -0,0 +1,88 @@
+import sys
+
+from elasticsearch.serializer import Deserializer as _Deserializer
+from elasticsearch.serializer import JSONSerializer as _JSONSerializer
+
+from .exceptions import SerializationError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JSONSerializer(_JSONSerializer):
+    # json.loads() accepts bytes since python 3.6
+    loads_bytes = sys.version_info >= (3, 6)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    JSON serializer backed by `orjson <https://github.com/ijl/orjson>`_.
+
+    Request bodies are serialized straight into bytes by ``dumps_bytes``
+    and responses are parsed from bytes, see ``decode_response``.
+    ``dumps`` still returns a string as expected by elasticsearch-py for
+    bulk bodies. Without orjson installed, and for data orjson can't
+    serialize, e.g. integers wider than 64 bits, it falls back to
+    :class:`JSONSerializer`.
+    """
+
+    loads_bytes = True
+
+    def loads(self, s):
+        if orjson is not None:
+            try:
+                return orjson.loads(s)
+            except ValueError:
+                pass
+
+        return super().loads(s)
+
+    def dumps(self, data):
+        if isinstance(data, (str, bytes)):
+            return data
+
+        return self.dumps_bytes(data).decode('utf-8')
+
+    def dumps_bytes(self, data):
+        # don't serialize strings
+        if isinstance(data, (str, bytes)):
+            return data
+
+        if orjson is not None:
+            try:
+                return orjson.dumps(
+                    data,
+                    default=self.default,
+                    option=orjson.OPT_NON_STR_KEYS,
+                )
+            except TypeError:
+                pass
+
+        return super().dumps(data).encode('utf-8', 'surrogatepass')
+
+
+class Deserializer(_Deserializer):
+
+    def loads(self, s, mimetype=None):
+        if not mimetype:
+            deserializer = self.default
+        else:
+            # split out charset
+            mimetype, _, _ = mimetype.partition(';')
+            try:
+                deserializer = self.serializers[mimetype]
+            except KeyError:
+                raise SerializationError(
+                    'Unknown mimetype, unable to deserialize: %s' % mimetype
+                )
+
+        # raw response body, decode it only if serializer can't parse bytes
+        if (
+            isinstance(s, bytes) and
+            not getattr(deserializer, 'loads_bytes', False)
+        ):
+            s = s.decode('utf-8')
+
+        return deserializer.loads(s)
@@ -0,0 +1,262 @@
+import asyncio
+import codecs
+import collections
+import json
+import re
+
+import aiohttp
+
+from .exceptions import (ConnectionError, ConnectionTimeout,
+                         SerializationError, SSLError)
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DELIMITERS = frozenset(' \t\n\r,:]}')
+
+
+class SearchResponseParser:
+    """
+    Incremental parser of search responses.
+
+    Hits of ``hits.hits`` are parsed one by one as the data is fed in,
+    everything else is collected into ``meta`` as soon as it's complete,
+    ``hits`` metadata like ``total`` goes into ``meta['hits']``.
+    """
+
+    def __init__(self):
+        self.meta = {}
+        self.hits = collections.deque()
+        # set once the hits array is reached or the response is over
+        self.in_hits = False
+        self.done = False
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+        self._parser = self._parse()
+
+    def feed(self, data):
+        text = self._decoder.decode(data)
+        # drop already parsed data
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        self._resume()
+
+    def feed_eof(self):
+        self._buf = self._buf[self._pos:] + self._decoder.decode(b'', True)
+        self._pos = 0
+        self._eof = True
+        self._resume()
+
+        if not self.done:
+            raise SerializationError(self._buf, 'Unexpected end of data')
+
+    def _resume(self):
+        if self.done:
+            return
+
+        try:
+            # parser yields when it needs more data
+            next(self._parser)
+        except StopIteration:
+            self.done = True
+            self.in_hits = True
+        except ValueError as exc:
+            raise SerializationError(self._buf, exc)
+
+    def _parse(self):
+        yield from self._object(self._on_member)
+        yield from self._skip_whitespace()
+
+        if self._pos < len(self._buf):
+            raise ValueError('Extra data at {}'.format(self._pos))
+
+    def _on_member(self, key):
+        if key == 'hits':
+            self.meta['hits'] = {}
+            yield from self._object(self._on_hits_member)
+        else:
+            self.meta[key] = yield from self._value()
+
+    def _on_hits_member(self, key):
+        if key == 'hits':
+            self.in_hits = True
+            yield from self._array(self.hits.append)
+        else:
+            self.meta['hits'][key] = yield from self._value()
+
+    def _object(self, on_member):
+        yield from self._expect('{')
+
+        char = yield from self._peek()
+        if char == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key = yield from self._value()
+            yield from self._expect(':')
+            yield from on_member(key)
+
+            char = yield from self._expect(',}')
+            if char == '}':
+                return
+
+    def _array(self, on_item):
+        yield from self._expect('[')
+
+        char = yield from self._peek()
+        if char == ']':
+            self._pos += 1
+            return
+
+        while True:
+            on_item((yield from self._value()))
+
+            char = yield from self._expect(',]')
+            if char == ']':
+                return
+
+    def _value(self):
+        yield from self._skip_whitespace()
+
+        attempted = 0
+        while True:
+            available = len(self._buf) - self._pos
+
+            # retry an incomplete value only after the data has doubled,
+            # parsing a huge document stays linear that way
+            if available > 2 * attempted or self._eof:
+                try:
+                    value, end = self._json.raw_decode(self._buf, self._pos)
+                except ValueError:
+                    if self._eof:
+                        raise
+                else:
+                    # a number may continue in the next chunk
+                    if self._eof or self._buf[end:end + 1] in _DELIMITERS:
+                        self._pos = end
+                        return value
+                attempted = available
+
+            yield
+
+    def _peek(self):
+        yield from self._skip_whitespace()
+
+        if self._pos >= len(self._buf):
+            raise ValueError('Unexpected end of data')
+
+        return self._buf[self._pos]
+
+    def _expect(self, chars):
+        char = yield from self._peek()
+
+        if char not in chars:
+            raise ValueError(
+                'Expecting {!r} at {}, got {!r}'.format(chars, self._pos, char)
+            )
+
+        self._pos += 1
+        return char
+
+    def _skip_whitespace(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+
+            if self._pos < len(self._buf) or self._eof:
+                return
+
+            yield
+
+
+class SearchResponseStream:
+    """
+    Search response read and parsed incrementally.
+
+    Returned by the transport for requests with ``stream`` param set,
+    e.g. ``await es.search(index='index', params={'stream': True})``.
+    Iterate it with ``async for`` to get hits one by one. Metadata parsed
+    so far is available by key like in a regular response: ``_scroll_id``,
+    ``_shards`` and ``hits.total`` are known from the start, keys which
+    follow hits, e.g. ``aggregations``, once all the hits are read.
+    The response is released when exhausted or closed.
+    """
+
+    def __init__(self, response, parser=None):
+        self._response = response
+        self._parser = parser or SearchResponseParser()
+
+    def __getitem__(self, key):
+        return self._parser.meta[key]
+
+    def get(self, key, default=None):
+        return self._parser.meta.get(key, default)
+
+    @property
+    def meta(self):
+        return self._parser.meta
+
+    async def __aenter__(self):  # noqa
+        return self
+
+    async def __aexit__(self, *exc_info):  # noqa
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):  # noqa
+        while not self._parser.hits:
+            if self._parser.done:
+                raise StopAsyncIteration
+
+            await self._read()
+
+        return self._parser.hits.popleft()
+
+    async def start(self):
+        """Read the response up to the first hit."""
+        while not self._parser.in_hits:
+            await self._read()
+
+    async def read_hits(self):
+        """Return a batch of hits parsed so far, empty at the end."""
+        while not self._parser.hits and not self._parser.done:
+            await self._read()
+
+        hits = list(self._parser.hits)
+        self._parser.hits.clear()
+
+        return hits
+
+    def close(self):
+        self._response.release()
+
+    async def _read(self):
+        try:
+            data = await self._read_chunk()
+
+            if data:
+                self._parser.feed(data)
+            else:
+                self._parser.feed_eof()
+        except BaseException:
+            self.close()
+            raise
+
+        if self._parser.done:
+            self.close()
+
+    async def _read_chunk(self):
+        # the same errors as for responses read by the connection
+        try:
+            return await self._response.content.readany()
+        except aiohttp.ClientSSLError as exc:
+            raise SSLError('N/A', str(exc), exc)
+        except asyncio.TimeoutError as exc:
+            raise ConnectionTimeout('TIMEOUT', str(exc), exc)
+        except aiohttp.ClientError as exc:
+            raise ConnectionError('N/A', str(exc), exc)
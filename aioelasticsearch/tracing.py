@@ -0,0 +1,90 @@
+import aiohttp
+
+__all__ = ('RequestTrace', 'trace_config')
+
+
+class RequestTrace:
+    """
+    Timings of request phases in seconds.
+
+    ``queue``
+        waiting for a free connection of the connector pool
+    ``dns``
+        resolving the host name
+    ``connect``
+        establishing a new connection, TCP connect and TLS handshake
+    ``server``
+        sending the request and waiting for the response headers
+    ``body``
+        reading the response body
+
+    Filled by the signals of ``trace_config()`` for requests made with
+    the trace as ``trace_request_ctx``. Phases a request didn't go through,
+    e.g. ``connect`` for a reused connection, are missing.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.phases = {}
+        self._started = {}
+
+    def __repr__(self):
+        return ' '.join(
+            '{}:{:.3f}s'.format(phase, duration)
+            for phase, duration in sorted(self.phases.items())
+        )
+
+    def start(self, phase):
+        self._started[phase] = self.loop.time()
+
+    def end(self, phase):
+        started = self._started.pop(phase, None)
+
+        if started is not None:
+            self.phases[phase] = self.loop.time() - started
+
+
+def _on_signal(*, start=(), end=()):
+    async def on_signal(session, trace_config_ctx, params):
+        trace = trace_config_ctx.trace_request_ctx
+
+        if not isinstance(trace, RequestTrace):
+            return
+
+        for phase in end:
+            trace.end(phase)
+
+        for phase in start:
+            trace.start(phase)
+
+    return on_signal
+
+
+async def _on_connection_create_end(session, trace_config_ctx, params):
+    trace = trace_config_ctx.trace_request_ctx
+
+    if not isinstance(trace, RequestTrace):
+        return
+
+    trace.end('connect')
+    trace.start('server')
+
+    # connection is established after the host is resolved
+    if 'connect' in trace.phases and 'dns' in trace.phases:
+        trace.phases['connect'] -= trace.phases['dns']
+
+
+def trace_config():
+    """Return ``aiohttp.TraceConfig`` filling ``RequestTrace`` phases."""
+    config = aiohttp.TraceConfig()
+
+    config.on_connection_queued_start.append(_on_signal(start=['queue']))
+    config.on_connection_queued_end.append(_on_signal(end=['queue']))
+    config.on_dns_resolvehost_start.append(_on_signal(start=['dns']))
+    config.on_dns_resolvehost_end.append(_on_signal(end=['dns']))
+    config.on_connection_create_start.append(_on_signal(start=['connect']))
+    config.on_connection_create_end.append(_on_connection_create_end)
+    config.on_connection_reuseconn.append(_on_signal(start=['server']))
+    config.on_request_end.append(_on_signal(end=['server'], start=['body']))
+
+    return config
@@ -1,18 +1,64 @@
 import asyncio
+import hashlib
 import logging
+import random
 from itertools import chain, count
 
-from elasticsearch.serializer import (DEFAULT_SERIALIZERS, Deserializer,
-                                      JSONSerializer)
+from elasticsearch.serializer import DEFAULT_SERIALIZERS
 from elasticsearch.transport import Transport, get_host_info
 
-from .connection import AIOHttpConnection
+from .connection import AIOHttpConnection, session_factory
 from .exceptions import (ConnectionError, ConnectionTimeout,
                          SerializationError, TransportError)
+from .metrics import TransportMetrics
 from .pool import AIOHttpConnectionPool, DummyConnectionPool
+from .retry import backoff
+from .serializer import Deserializer, JSONSerializer
+from .streaming import SearchResponseStream
+from .tracing import trace_config
 
 logger = logging.getLogger('elasticsearch')
 
+# reads sent with POST because of the body
+_POST_READS = frozenset(['_search', '_count', '_mget', '_msearch'])
+
+# params opening a cursor on the server, e.g. a scroll context
+_CURSOR_PARAMS = frozenset(['scroll'])
+
+
+def _is_idempotent_read(method, url, params=None):
+    if params and not _CURSOR_PARAMS.isdisjoint(params):
+        return False
+
+    segments = url.split('?', 1)[0].strip('/').split('/')
+
+    if method in ('GET', 'HEAD'):
+        # scrolling moves the cursor
+        return 'scroll' not in segments
+
+    return method == 'POST' and segments[-1] in _POST_READS
+
+
+def _host_identity(host):
+    # attributes of a node may change, it's still the same node
+    return {key: value for key, value in host.items() if key != 'attributes'}
+
+
+def _cache_key(method, url, params, body, headers):
+    if body is not None:
+        if isinstance(body, str):
+            body = body.encode('utf-8', 'surrogatepass')
+        body = hashlib.sha1(body).hexdigest()
+
+    return (method, url, _items(params), _items(headers), body)
+
+
+def _items(mapping):
+    if not mapping:
+        return ()
+
+    return tuple(sorted((key, str(value)) for key, value in mapping.items()))
+
 
 class AIOHttpTransport(Transport):
 
@@ -28,18 +74,44 @@ class AIOHttpTransport(Transport):
         sniffer_timeout=None,
         sniff_timeout=.1,
         sniff_on_connection_fail=False,
+        min_sniff_interval=1,
         default_mimetype='application/json',
         max_retries=3,
         retry_on_status=(502, 503, 504, ),
         retry_on_timeout=False,
         send_get_body_as='GET',
+        metrics=None,
+        sniff_in_background=False,
+        sniffer_jitter=.1,
+        health_check=False,
+        health_check_timeout=1,
+        shared_session=False,
+        shared_session_maxsize=100,
+        warmup_connections=0,
+        retry_backoff=0,
+        retry_backoff_max=10,
+        retry_budget=None,
+        hedge_after=None,
+        hedge_quantile=None,
+        coalesce_reads=False,
+        response_cache=None,
+        cache_reads=False,
         *,
         loop,
         **kwargs
     ):
+        assert not(
+            shared_session and kwargs.get('session')
+        ), 'Provide `session` or `shared_session`, not both.'
+
         self.loop = loop
         self._closed = False
 
+        # request metrics of all the connections
+        if metrics is None:
+            metrics = TransportMetrics()
+        self.metrics = metrics
+
         _serializers = DEFAULT_SERIALIZERS.copy()
         # if a serializer has been specified,
         # use it for deserialization as well
@@ -56,14 +128,49 @@ class AIOHttpTransport(Transport):
         self.retry_on_status = retry_on_status
         self.send_get_body_as = send_get_body_as
 
+        # wait for a random time up to `retry_backoff` seconds doubled with
+        # every attempt, but at most `retry_backoff_max`, before retrying
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        # `RetryBudget` shared by all the requests
+        self.retry_budget = retry_budget
+
+        # send idempotent reads to another node too if there is no response
+        # in `hedge_after` seconds or the `hedge_quantile` of the endpoint
+        # latency, whichever is longer, hedges draw from the retry budget
+        self.hedge_after = hedge_after
+        self.hedge_quantile = hedge_quantile
+
+        # concurrent identical idempotent reads share the request in flight
+        # and its result
+        self.coalesce_reads = coalesce_reads
+        self._coalesced = {}
+
+        # `ResponseCache` for successful idempotent reads, all of them
+        # with `cache_reads` or the ones with `cache` param set otherwise
+        self.response_cache = response_cache
+        self.cache_reads = cache_reads
+
         # data serializer
         self.serializer = serializer
 
         # sniffing data
         self.sniffer_timeout = sniffer_timeout
         self.sniff_on_connection_fail = sniff_on_connection_fail
+        # failing requests don't sniff again until `min_sniff_interval`
+        # seconds passed since the last sniff
+        self.min_sniff_interval = min_sniff_interval
         self.last_sniff = self.loop.time()
         self.sniff_timeout = sniff_timeout
+        # sniff every `sniffer_timeout` seconds, give or take
+        # `sniffer_jitter` of it, in a task instead of before requests
+        self.sniff_in_background = sniff_in_background
+        self.sniffer_jitter = sniffer_jitter
+
+        # ping dead connections in a task on their timeout schedule
+        # instead of resurrecting them for requests
+        self.health_check = health_check
+        self.health_check_timeout = health_check_timeout
 
         # callback to construct host dict from data in /_cluster/nodes
         self.host_info_callback = host_info_callback
@@ -71,12 +178,30 @@ class AIOHttpTransport(Transport):
         # store all strategies...
         self.connection_pool_class = connection_pool_class
         self.connection_class = connection_class
-        self._connection_pool_lock = asyncio.Lock(loop=self.loop)
+
+        # sniff in flight and the time the last one finished
+        self._sniff_task = None
+        self._sniffed_at = None
+
+        # ping of all the dead connections in flight and the wake up call
+        # for the health checker
+        self._ping_task = None
+        self._dead_event = asyncio.Event(loop=self.loop)
+
+        # open sockets to sniffed nodes before they are used
+        self.warmup_connections = warmup_connections
 
         # ...save kwargs to be passed to the connections
         self.kwargs = kwargs
         self.hosts = hosts
 
+        # one session for all the connections, limited to
+        # `shared_session_maxsize` connections in total
+        # and `maxsize` connections per node
+        self.session = None
+        if shared_session:
+            self.session = self._create_session(shared_session_maxsize)
+
         # ...and instantiate them
         self.set_connections(hosts)
         # retain the original connection instances for sniffing
@@ -96,10 +221,29 @@ class AIOHttpTransport(Transport):
                                                             loop=self.loop)
             self.initial_sniff_task.add_done_callback(_initial_sniff_reset)
 
+        self.sniffer_task = None
+
+        if self.sniffer_timeout and self.sniff_in_background:
+            self.sniffer_task = asyncio.ensure_future(
+                self._sniff_periodically(),
+                loop=self.loop,
+            )
+
+        self.health_check_task = None
+
+        if self.health_check:
+            self.health_check_task = asyncio.ensure_future(
+                self._check_health_periodically(),
+                loop=self.loop,
+            )
+
     def set_connections(self, hosts):
         if self._closed:
             raise RuntimeError("Transport is closed")
 
+        self.connection_pool = self._create_connection_pool(hosts)
+
+    def _create_connection_pool(self, hosts):
         def _create_connection(host):
             # if this is not the initial setup look at the existing connection
             # options and identify connections that haven't changed and can be
@@ -109,12 +253,17 @@ class AIOHttpTransport(Transport):
                                         self.seed_connection_opts)
 
                 for (connection, old_host) in existing_connections:
-                    if old_host == host:
+                    if _host_identity(old_host) == _host_identity(host):
                         return connection
 
             kwargs = self.kwargs.copy()
             kwargs.update(host)
             kwargs['loop'] = self.loop
+            kwargs['metrics'] = self.metrics
+
+            if self.session is not None:
+                kwargs.pop('session_factory', None)
+                kwargs['session'] = self.session
 
             return self.connection_class(**kwargs)
 
@@ -123,18 +272,38 @@ class AIOHttpTransport(Transport):
         connections = list(zip(connections, hosts))
 
         if len(connections) == 1:
-            self.connection_pool = DummyConnectionPool(
+            return DummyConnectionPool(
                 connections,
                 loop=self.loop,
                 **self.kwargs
             )
         else:
-            self.connection_pool = self.connection_pool_class(
+            return self.connection_pool_class(
                 connections,
+                health_check=self.health_check,
                 loop=self.loop,
                 **self.kwargs
             )
 
+    def _create_session(self, limit):
+        kwargs = self.kwargs
+        factory = kwargs.get('session_factory', session_factory)
+
+        # connections pass their auth with requests
+        return factory(
+            loop=self.loop,
+            ssl=(
+                kwargs.get('ssl_context')
+                if kwargs.get('verify_certs') else False
+            ),
+            limit=limit,
+            limit_per_host=kwargs.get('maxsize', 10),
+            use_dns_cache=kwargs.get('use_dns_cache', False),
+            trace_configs=(
+                [trace_config()] if kwargs.get('trace_requests') else None
+            ),
+        )
+
     async def _get_sniff_data(self, initial=False):
         previous_sniff = self.last_sniff
 
@@ -176,28 +345,143 @@ class AIOHttpTransport(Transport):
 
         return list(node_info['nodes'].values())
 
+    def _get_host_info(self, host_info):
+        host = super()._get_host_info(host_info)
+
+        # node attributes, e.g. zone, are available to selectors
+        if host is not None and host_info.get('attributes'):
+            host = dict(host, attributes=host_info['attributes'])
+
+        return host
+
     async def sniff_hosts(self, initial=False):
         if self._closed:
             raise RuntimeError("Transport is closed")
-        async with self._connection_pool_lock:
-            node_info = await self._get_sniff_data(initial)
-            hosts = (self._get_host_info(n) for n in node_info)
-            hosts = [host for host in hosts if host is not None]
-            # we weren't able to get any nodes, maybe using an incompatible
-            # transport_schema or host_info_callback blocked all - raise error.
-            if not hosts:
-                raise TransportError(
-                    'N/A', 'Unable to sniff hosts - no viable hosts found.',
+
+        # concurrent callers share the sniff in flight
+        if self._sniff_task is None:
+            self._sniff_task = asyncio.ensure_future(
+                self._sniff_hosts(initial),
+                loop=self.loop,
+            )
+            self._sniff_task.add_done_callback(self._sniff_done)
+
+        # a cancelled caller doesn't cancel the sniff of the others
+        await asyncio.shield(self._sniff_task, loop=self.loop)
+
+    def _sniff_done(self, fut):
+        self._sniff_task = None
+        self._sniffed_at = self.loop.time()
+
+    async def _sniff_hosts(self, initial):
+        node_info = await self._get_sniff_data(initial)
+        hosts = (self._get_host_info(n) for n in node_info)
+        hosts = [host for host in hosts if host is not None]
+        # we weren't able to get any nodes, maybe using an incompatible
+        # transport_schema or host_info_callback blocked all - raise error.
+        if not hosts:
+            raise TransportError(
+                'N/A', 'Unable to sniff hosts - no viable hosts found.',
+            )
+
+        old_connection_pool = self.connection_pool
+
+        connection_pool = self._create_connection_pool(hosts)
+
+        if self.warmup_connections:
+            # only new connections need it
+            reused = (self.seed_connections |
+                      old_connection_pool.orig_connections)
+            try:
+                await connection_pool.warmup(
+                    self.warmup_connections, skip=reused,
                 )
+            except asyncio.CancelledError:
+                await connection_pool.close(skip=reused)
+                raise
+
+        self.connection_pool = connection_pool
+
+        skip = (self.seed_connections |
+                self.connection_pool.orig_connections)
+
+        await old_connection_pool.close(skip=skip)
+
+    async def warmup(self, count=None):
+        """
+        Open ``count`` keep-alive sockets to every node,
+        ``warmup_connections`` and at least one by default.
+        """
+        if self._closed:
+            raise RuntimeError("Transport is closed")
+
+        if count is None:
+            count = max(self.warmup_connections, 1)
+
+        await self.connection_pool.warmup(count)
 
-            old_connection_pool = self.connection_pool
+    async def _sniff_periodically(self):
+        while True:
+            jitter = random.uniform(-self.sniffer_jitter, self.sniffer_jitter)
+            interval = self.sniffer_timeout * (1 + jitter)
+
+            # sniffs on connection failures postpone the next one
+            last_sniff = self.last_sniff
+            delay = last_sniff + interval - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay, loop=self.loop)
+                if self.last_sniff != last_sniff:
+                    continue
+
+            try:
+                await self.sniff_hosts()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning('Sniffing hosts in background failed.',
+                               exc_info=True)
+                # retry in the next interval
+                self.last_sniff = self.loop.time()
+
+    async def _check_health_periodically(self):
+        while True:
+            # marking connections dead during the ping wakes us up right away
+            self._dead_event.clear()
+
+            try:
+                delay = await self.connection_pool.ping_dead(
+                    timeout=self.health_check_timeout,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning('Pinging dead connections failed.',
+                               exc_info=True)
+                delay = self.connection_pool.next_ping_delay()
+
+            try:
+                await asyncio.wait_for(
+                    self._dead_event.wait(), delay, loop=self.loop,
+                )
+            except asyncio.TimeoutError:
+                pass
 
-            self.set_connections(hosts)
+    async def _ping_dead(self):
+        # concurrent callers share the ping in flight
+        if self._ping_task is None:
+            self._ping_task = asyncio.ensure_future(
+                self.connection_pool.ping_dead(
+                    timeout=self.health_check_timeout,
+                    force=True,
+                ),
+                loop=self.loop,
+            )
+            self._ping_task.add_done_callback(self._ping_done)
 
-            skip = (self.seed_connections |
-                    self.connection_pool.orig_connections)
+        await asyncio.shield(self._ping_task, loop=self.loop)
 
-            await old_connection_pool.close(skip=skip)
+    def _ping_done(self, fut):
+        self._ping_task = None
 
     async def close(self):
         if self._closed:
@@ -217,9 +501,59 @@ class AIOHttpTransport(Transport):
 
             coros.append(_initial_sniff_wrapper())
 
+        if self._sniff_task is not None:
+            sniff_task = self._sniff_task
+            sniff_task.cancel()
+
+            async def _sniff_wrapper():
+                try:
+                    await sniff_task
+                except asyncio.CancelledError:
+                    return
+
+            coros.append(_sniff_wrapper())
+
+        if self.sniffer_task is not None:
+            self.sniffer_task.cancel()
+
+            async def _sniffer_wrapper():
+                try:
+                    await self.sniffer_task
+                except asyncio.CancelledError:
+                    return
+
+            coros.append(_sniffer_wrapper())
+
+        if self.health_check_task is not None:
+            self.health_check_task.cancel()
+
+            async def _health_check_wrapper():
+                try:
+                    await self.health_check_task
+                except asyncio.CancelledError:
+                    return
+
+            coros.append(_health_check_wrapper())
+
+        if self._ping_task is not None:
+            ping_task = self._ping_task
+            ping_task.cancel()
+
+            async def _ping_wrapper():
+                try:
+                    await ping_task
+                except asyncio.CancelledError:
+                    return
+
+            coros.append(_ping_wrapper())
+
         coros.append(self.connection_pool.close())
 
         await asyncio.gather(*coros, loop=self.loop)
+
+        if self.session is not None:
+            await self.session.close()
+
         self._closed = True
 
     async def get_connection(self):
@@ -228,68 +562,232 @@ class AIOHttpTransport(Transport):
         if self.initial_sniff_task is not None:
             await self.initial_sniff_task
 
-        if self.sniffer_timeout:
+        if self.sniffer_timeout and not self.sniff_in_background:
             if self.loop.time() >= self.last_sniff + self.sniffer_timeout:
                 await self.sniff_hosts()
 
-        async with self._connection_pool_lock:
-            return self.connection_pool.get_connection()
+        # nothing may be up, ping the dead connections
+        # instead of sending the request to one of them
+        if self.health_check and not self.connection_pool.connections:
+            await self._ping_dead()
+
+        # sniffing replaces the pool with a single assignment,
+        # selecting from it doesn't need the lock
+        return self.connection_pool.get_connection()
 
     async def mark_dead(self, connection):
         if self._closed:
             raise RuntimeError("Transport is closed")
         self.connection_pool.mark_dead(connection)
 
-        if self.sniff_on_connection_fail:
+        if self.health_check:
+            self._dead_event.set()
+
+        if self.sniff_on_connection_fail and self._sniff_allowed():
             await self.sniff_hosts()
 
+    def _sniff_allowed(self):
+        # joining the sniff in flight is always allowed
+        if self._sniff_task is not None or self._sniffed_at is None:
+            return True
+
+        return self.loop.time() >= self._sniffed_at + self.min_sniff_interval
+
     async def _perform_request(
         self,
         method, url, params, body,
-        ignore=(), timeout=None, headers=None,
+        ignore=(), timeout=None, headers=None, stream=False, cache_key=None,
     ):
+        # only connections supporting streams get the argument
+        kwargs = {'stream': True} if stream else {}
+
+        hedge_delay = (
+            None if stream else self._hedge_delay(method, url, params)
+        )
+
         for attempt in count(1):  # pragma: no branch
             connection = await self.get_connection()
 
             try:
-
-                status, headers, data = await connection.perform_request(
-                    method, url, params, body,
-                    ignore=ignore, timeout=timeout, headers=headers,
-                )
+                if hedge_delay is None:
+                    status, headers, data = await connection.perform_request(
+                        method, url, params, body,
+                        ignore=ignore, timeout=timeout, headers=headers,
+                        **kwargs
+                    )
+                else:
+                    connection, (status, headers, data) = (
+                        await self._perform_hedged_request(
+                            connection, hedge_delay,
+                            method, url, params, body,
+                            ignore=ignore, timeout=timeout, headers=headers,
+                        )
+                    )
             except TransportError as e:
                 if method == 'HEAD' and e.status_code == 404:
                     return False
 
-                retry = False
-                if isinstance(e, ConnectionTimeout):
-                    retry = self.retry_on_timeout
-                elif isinstance(e, ConnectionError):
-                    retry = True
-                elif e.status_code in self.retry_on_status:
-                    retry = True
-
-                if retry:
+                if self._is_retryable(e):
                     await self.mark_dead(connection)
 
                     if attempt == self.max_retries:
                         raise
+
+                    if (
+                        self.retry_budget is not None and
+                        not self.retry_budget.withdraw()
+                    ):
+                        logger.warning(
+                            'Retry budget is exhausted, not retrying %s %s.',
+                            method, url,
+                        )
+                        raise
+
+                    self.metrics.observe_retry(connection.host, method, url)
+
+                    if self.retry_backoff:
+                        await asyncio.sleep(
+                            backoff(
+                                attempt,
+                                self.retry_backoff,
+                                self.retry_backoff_max,
+                            ),
+                            loop=self.loop,
+                        )
                 else:
                     raise
 
             else:
                 self.connection_pool.mark_live(connection)
 
+                if self.retry_budget is not None:
+                    self.retry_budget.deposit()
+
                 if method == 'HEAD':
                     return 200 <= status < 300
 
-                if data:
-                    data = self.deserializer.loads(
-                        data, headers.get('content-type'),
+                if stream and not isinstance(data, (str, bytes)):
+                    return await self._start_stream(data)
+
+                content_type = headers.get('content-type')
+
+                # cached undeserialized to give every caller its own result
+                if cache_key is not None and 200 <= status < 300:
+                    size = len(data)
+                    if isinstance(data, str):
+                        size = len(data.encode('utf-8', 'surrogatepass'))
+
+                    self.response_cache.set(
+                        cache_key, (content_type, data), size,
                     )
 
+                if data:
+                    data = self.deserializer.loads(data, content_type)
+
                 return data
 
+    def _is_retryable(self, e):
+        if isinstance(e, ConnectionTimeout):
+            return self.retry_on_timeout
+        if isinstance(e, ConnectionError):
+            return True
+        return e.status_code in self.retry_on_status
+
+    def _hedge_delay(self, method, url, params=None):
+        if (
+            self.hedge_after is None or
+            not _is_idempotent_read(method, url, params)
+        ):
+            return None
+
+        delay = self.hedge_after
+
+        if self.hedge_quantile is not None:
+            latency = self.metrics.quantile(method, url, self.hedge_quantile)
+            if latency is not None:
+                delay = max(delay, latency)
+
+        return delay
+
+    async def _perform_hedged_request(
+        self,
+        connection,
+        delay,
+        *args,
+        **kwargs
+    ):
+        """
+        Send the request to another connection too if ``connection`` didn't
+        respond in ``delay`` seconds. Return the connection which responded
+        first and its response, the other request is cancelled.
+
+        Retryable errors wait for the other request, connections failed
+        with them are marked dead unless it's ``connection`` failed along
+        with the other one, its error is raised then.
+        """
+        first = asyncio.ensure_future(
+            connection.perform_request(*args, **kwargs),
+            loop=self.loop,
+        )
+        tasks = {first: connection}
+        failed = []
+
+        try:
+            await asyncio.wait([first], timeout=delay, loop=self.loop)
+
+            if not first.done():
+                hedge = self.connection_pool.get_other_connection(connection)
+
+                if hedge is not None and (
+                    self.retry_budget is None or
+                    self.retry_budget.withdraw()
+                ):
+                    logger.debug('Hedging %r with %r.', connection, hedge)
+
+                    task = asyncio.ensure_future(
+                        hedge.perform_request(*args, **kwargs),
+                        loop=self.loop,
+                    )
+                    tasks[task] = hedge
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    loop=self.loop,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in done:
+                    e = task.exception()
+
+                    if e is None:
+                        for failed_task in failed:
+                            await self.mark_dead(tasks[failed_task])
+
+                        return tasks[task], task.result()
+
+                    if not (
+                        isinstance(e, TransportError) and
+                        self._is_retryable(e)
+                    ):
+                        raise e
+
+                    failed.append(task)
+
+            for failed_task in failed:
+                if failed_task is not first:
+                    await self.mark_dead(tasks[failed_task])
+
+            raise first.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # errors of the losing request are handled or ignored
+                    task.exception()
+
     async def perform_request(self, method, url, headers=None, params=None, body=None):  # noqa
         if self._closed:
             raise RuntimeError("Transport is closed")
@@ -303,7 +801,11 @@ class AIOHttpTransport(Transport):
                 params[k] = v
 
         if body is not None:
-            body = self.serializer.dumps(body)
+            # serializers producing bytes skip the encoding below
+            dumps = getattr(
+                self.serializer, 'dumps_bytes', self.serializer.dumps,
+            )
+            body = dumps(body)
 
             # some clients or environments don't support sending GET with body
             if method in ('HEAD', 'GET') and self.send_get_body_as != 'GET':
@@ -315,6 +817,8 @@ class AIOHttpTransport(Transport):
                 elif self.send_get_body_as == 'source':
                     if params is None:
                         params = {}
+                    if isinstance(body, bytes):
+                        body = body.decode('utf-8')
                     params['source'] = body
                     params['source_content_type'] = self.serializer.mimetype
                     body = None
@@ -328,13 +832,96 @@ class AIOHttpTransport(Transport):
 
         ignore = ()
         timeout = None
+        stream = False
+        cache = None
         if params:
             timeout = params.pop('request_timeout', None)
             ignore = params.pop('ignore', ())
             if isinstance(ignore, int):
                 ignore = (ignore, )
+            stream = params.pop('stream', False)
+            cache = params.pop('cache', None)
+
+        idempotent_read = (
+            not stream and _is_idempotent_read(method, url, params)
+        )
+
+        # searches opening a scroll aren't idempotent, they aren't cached
+        cache_key = None
+        if cache is None:
+            cache = self.cache_reads
+        if (
+            cache and
+            idempotent_read and
+            method != 'HEAD' and
+            self.response_cache is not None
+        ):
+            cache_key = _cache_key(method, url, params, body, headers)
+
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                content_type, data = cached
+                if data:
+                    data = self.deserializer.loads(data, content_type)
+                return data
+
+        if self.coalesce_reads and idempotent_read:
+            return await self._perform_coalesced_request(
+                method, url, params, body,
+                ignore=ignore, timeout=timeout, headers=headers,
+                cache_key=cache_key,
+            )
 
         return await self._perform_request(
             method, url, params, body,
-            ignore=ignore, timeout=timeout, headers=headers,
+            ignore=ignore, timeout=timeout, headers=headers, stream=stream,
+            cache_key=cache_key,
         )
+
+    async def _perform_coalesced_request(
+        self,
+        method, url, params, body,
+        ignore=(), timeout=None, headers=None, cache_key=None,
+    ):
+        key = (
+            method,
+            url,
+            _items(params),
+            body,
+            ignore,
+            timeout,
+            _items(headers),
+        )
+
+        task = self._coalesced.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(
+                self._perform_request(
+                    method, url, params, body,
+                    ignore=ignore, timeout=timeout, headers=headers,
+                    cache_key=cache_key,
+                ),
+                loop=self.loop,
+            )
+            self._coalesced[key] = task
+
+            def _coalesced_done(fut):
+                del self._coalesced[key]
+
+            task.add_done_callback(_coalesced_done)
+
+        # a cancelled caller doesn't cancel the request of the others
+        return await asyncio.shield(task, loop=self.loop)
+
+    async def _start_stream(self, response):
+        stream = SearchResponseStream(response)
+
+        try:
+            # metadata preceding the hits is available right away
+            await stream.start()
+        except BaseException:
+            stream.close()
+            raise
+
+        return stream
@@ -0,0 +1,121 @@
+"""
+Compare connection selection of AIOHttpTransport with selection under
+a pool lock held by sniffing, at high concurrency and while sniffing.
+
+    python benchmarks/connection_selection.py
+"""
+import asyncio
+import time
+
+from aioelasticsearch import AIOHttpTransport
+from aioelasticsearch.connection import AIOHttpConnection
+
+REQUESTS = 50000
+SNIFF_TIME = .05
+
+HOSTS = [{'host': '127.0.0.1', 'port': 9200 + i} for i in range(3)]
+NODES = [
+    {'http': {'publish_address': '{host}:{port}'.format(**host)}}
+    for host in HOSTS
+]
+
+
+class Connection(AIOHttpConnection):
+
+    async def perform_request(self, *args, **kwargs):
+        # a response arriving right away
+        await asyncio.sleep(0, loop=self.loop)
+        return 200, {}, ''
+
+
+class Transport(AIOHttpTransport):
+
+    async def _get_sniff_data(self, initial=False):
+        # waiting for /_nodes/_all/http
+        await asyncio.sleep(SNIFF_TIME, loop=self.loop)
+        return NODES
+
+
+class LockedTransport(Transport):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._connection_pool_lock = asyncio.Lock(loop=self.loop)
+
+    async def sniff_hosts(self, initial=False):
+        async with self._connection_pool_lock:
+            await super().sniff_hosts(initial)
+
+    async def get_connection(self):
+        async with self._connection_pool_lock:
+            return self.connection_pool.get_connection()
+
+
+async def run(transport_class, concurrency, sniff, loop):
+    transport = transport_class(
+        HOSTS,
+        connection_class=Connection,
+        loop=loop,
+    )
+    latencies = []
+    requests = iter(range(REQUESTS))
+
+    async def worker():
+        for _ in requests:
+            start = loop.time()
+            await transport.perform_request('GET', '/')
+            latencies.append(loop.time() - start)
+
+    async def sniffer():
+        while True:
+            await transport.sniff_hosts()
+            await asyncio.sleep(SNIFF_TIME, loop=loop)
+
+    sniff_task = asyncio.ensure_future(sniffer(), loop=loop) if sniff else None
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[worker() for _ in range(concurrency)],
+        loop=loop
+    )
+    elapsed = time.perf_counter() - start
+
+    if sniff_task is not None:
+        sniff_task.cancel()
+        try:
+            await sniff_task
+        except asyncio.CancelledError:
+            pass
+
+    await transport.close()
+
+    latencies.sort()
+    return (
+        REQUESTS / elapsed,
+        latencies[int(len(latencies) * .99)] * 1000,
+    )
+
+
+def main():
+    loop = asyncio.get_event_loop()
+
+    print('{:<28} {:>12} {:>12}'.format('', 'requests/s', 'p99 ms'))
+    for sniff in (False, True):
+        for concurrency in (10, 1000, 10000):
+            print('concurrency {}{}'.format(
+                concurrency, ', sniffing' if sniff else '',
+            ))
+            for name, transport_class in (
+                ('  lock', LockedTransport),
+                ('  lock-free', Transport),
+            ):
+                rate, p99 = loop.run_until_complete(
+                    run(transport_class, concurrency, sniff, loop),
+                )
+                print('{:<28} {:>12.0f} {:>12.2f}'.format(name, rate, p99))
+
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
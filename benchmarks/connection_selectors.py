@@ -0,0 +1,115 @@
+"""
+Compare connection selectors against local stand-in nodes with
+heterogeneous latency: two fast nodes and a slow one, e.g. busy with GC.
+Every node serves a limited number of requests at once and queues the rest.
+
+    python benchmarks/connection_selectors.py
+"""
+import asyncio
+import random
+import time
+
+from aiohttp import web
+
+from aioelasticsearch import (EWMASelector, LeastOutstandingSelector,
+                              PowerOfTwoChoicesSelector, RoundRobinSelector)
+from aioelasticsearch.connection import AIOHttpConnection
+from aioelasticsearch.transport import AIOHttpTransport
+
+# (port, mean latency in seconds, requests served at once)
+NODES = [
+    (19200, .005, 16),
+    (19201, .005, 16),
+    (19202, .05, 16),
+]
+CONCURRENCY = 48
+REQUESTS = 5000
+
+
+def node_app(latency, capacity, loop):
+    semaphore = asyncio.Semaphore(capacity, loop=loop)
+
+    async def handler(request):
+        async with semaphore:
+            await asyncio.sleep(
+                random.uniform(latency * .5, latency * 1.5), loop=loop,
+            )
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+    return app
+
+
+async def run(selector_class, loop):
+    transport = AIOHttpTransport(
+        [{'host': '127.0.0.1', 'port': port} for port, _, _ in NODES],
+        connection_class=AIOHttpConnection,
+        selector_class=selector_class,
+        maxsize=CONCURRENCY,
+        loop=loop,
+    )
+    latencies = []
+    requests = iter(range(REQUESTS))
+
+    async def worker():
+        for _ in requests:
+            start = loop.time()
+            await transport.perform_request('GET', '/')
+            latencies.append(loop.time() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[worker() for _ in range(CONCURRENCY)],
+        loop=loop
+    )
+    elapsed = time.perf_counter() - start
+
+    counts = [
+        series['requests']
+        for series in sorted(transport.metrics.snapshot(),
+                             key=lambda series: series['node'])
+    ]
+
+    await transport.close()
+
+    latencies.sort()
+    return (
+        REQUESTS / elapsed,
+        latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * .99)] * 1000,
+        counts,
+    )
+
+
+async def main(loop):
+    runners = []
+    for port, latency, capacity in NODES:
+        runner = web.AppRunner(node_app(latency, capacity, loop))
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        runners.append(runner)
+
+    print('{:<28} {:>10} {:>8} {:>8}   {}'.format(
+        '', 'requests/s', 'p50 ms', 'p99 ms', 'requests by node',
+    ))
+    try:
+        for name, selector_class in (
+            ('RoundRobinSelector', RoundRobinSelector),
+            ('LeastOutstandingSelector', LeastOutstandingSelector),
+            ('EWMASelector', EWMASelector),
+            ('PowerOfTwoChoicesSelector', PowerOfTwoChoicesSelector),
+        ):
+            rate, p50, p99, counts = await run(selector_class, loop)
+            print('{:<28} {:>10.0f} {:>8.1f} {:>8.1f}   {}'.format(
+                name, rate, p50, p99, counts,
+            ))
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main(loop))
+    loop.close()
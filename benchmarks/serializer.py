@@ -0,0 +1,114 @@
+"""
+Compare request and response serialization paths of JSONSerializer and
+OrjsonSerializer on search and bulk payloads.
+
+    python benchmarks/serializer.py
+"""
+import timeit
+
+from aioelasticsearch.serializer import (Deserializer, JSONSerializer,
+                                         OrjsonSerializer, orjson)
+
+
+def search_response(hits=1000):
+    return {
+        '_scroll_id': 'DXF1ZXJ5QW5kRmV0Y2gBAAAAAAAAAD4WYm9laVYtZndUQlNsdDcwakFMNjU1QQ==',  # noqa
+        'took': 12,
+        'timed_out': False,
+        '_shards': {'total': 5, 'successful': 5, 'skipped': 0, 'failed': 0},
+        'hits': {
+            'total': {'value': hits, 'relation': 'eq'},
+            'max_score': 1.0,
+            'hits': [
+                {
+                    '_index': 'index',
+                    '_type': '_doc',
+                    '_id': str(i),
+                    '_score': 1.0,
+                    '_source': {
+                        'title': 'Document number {}'.format(i),
+                        'body': 'lorem ipsum dolor sit amet ' * 20,
+                        'tags': ['foo', 'bar', 'baz'],
+                        'count': i,
+                        'price': i * 1.5,
+                    },
+                }
+                for i in range(hits)
+            ],
+        },
+    }
+
+
+def search_request():
+    return {
+        'query': {
+            'bool': {
+                'must': [{'match': {'title': 'document'}}],
+                'filter': [
+                    {'terms': {'tags': ['foo', 'bar']}},
+                    {'range': {'count': {'gte': 10, 'lte': 1000}}},
+                ],
+            },
+        },
+        'aggs': {'tags': {'terms': {'field': 'tags', 'size': 100}}},
+        'size': 100,
+    }
+
+
+def bulk_actions(docs=1000):
+    for hit in search_response(docs)['hits']['hits']:
+        yield {'index': {'_index': hit['_index'], '_id': hit['_id']}}
+        yield hit['_source']
+
+
+def bench(name, func, number):
+    elapsed = min(timeit.repeat(func, number=number, repeat=5))
+    print('{:<40} {:>10.1f} us'.format(name, elapsed / number * 1e6))
+
+
+def main():
+    if orjson is None:
+        print('orjson is not installed, OrjsonSerializer falls back '
+              'to JSONSerializer\n')
+
+    json_serializer = JSONSerializer()
+    orjson_serializer = OrjsonSerializer()
+
+    json_deserializer = Deserializer(
+        {JSONSerializer.mimetype: json_serializer},
+    )
+    orjson_deserializer = Deserializer(
+        {OrjsonSerializer.mimetype: orjson_serializer},
+    )
+
+    request = search_request()
+    response_bytes = json_serializer.dumps(search_response()).encode('utf-8')
+    response_text = response_bytes.decode('utf-8')
+    actions = list(bulk_actions())
+
+    print('search request body')
+    bench('  json dumps + encode',
+          lambda: json_serializer.dumps(request).encode('utf-8'), 10000)
+    bench('  orjson dumps_bytes',
+          lambda: orjson_serializer.dumps_bytes(request), 10000)
+
+    print('search response body, {} KB'.format(len(response_bytes) // 1024))
+    bench('  json decode + loads',
+          lambda: json_deserializer.loads(response_bytes.decode('utf-8')),
+          20)
+    bench('  json loads str',
+          lambda: json_deserializer.loads(response_text), 20)
+    bench('  orjson loads bytes',
+          lambda: orjson_deserializer.loads(response_bytes), 20)
+
+    print('bulk body, {} actions'.format(len(actions) // 2))
+    bench('  json dumps + encode',
+          lambda: '\n'.join(map(json_serializer.dumps, actions)).encode(),
+          20)
+    bench('  orjson dumps_bytes',
+          lambda: b'\n'.join(map(orjson_serializer.dumps_bytes, actions)),
+          20)
+
+
+if __name__ == '__main__':
+    main()
@@ -32,6 +32,9 @@ setup(
         'elasticsearch>=7.0.0',
         'aiohttp>=3.5.0,<4.0.0',
     ],
+    extras_require={
+        'orjson': ['orjson>=3.0.0; python_version>="3.6"'],
+    },
     python_requires='>=3.5.3',
     packages=['aioelasticsearch'],
     include_package_data=True,
@@ -0,0 +1,230 @@
+import asyncio
+
+import pytest
+
+from aioelasticsearch import Elasticsearch, NotFoundError, TransportError
+
+DOCS = {
+    ('index', '1'): {'_index': 'index', '_id': '1', 'found': True,
+                     '_source': {'a': 1}},
+    ('index', '2'): {'_index': 'index', '_id': '2', 'found': False},
+    ('other', '1'): {'_index': 'other', '_id': '1', 'found': True,
+                     '_source': {'a': 2}},
+    ('missing', '1'): {'_index': 'missing', '_id': '1',
+                       'error': {'type': 'index_not_found_exception'}},
+    ('broken', '1'): {'_index': 'broken', '_id': '1',
+                      'error': {'type': 'shard_failure'}},
+}
+
+
+@pytest.fixture
+def es(loop, auto_close, mocker):
+    es = auto_close(Elasticsearch([{}], batch_gets=True, loop=loop))
+    es.mget_calls = []
+
+    async def mget(body, params):
+        es.mget_calls.append((body, params))
+        await asyncio.sleep(0, loop=loop)
+        return {'docs': [
+            DOCS[doc['_index'], doc['_id']] for doc in body['docs']
+        ]}
+
+    mocker.patch.object(es, 'mget', side_effect=mget)
+
+    return es
+
+
+@pytest.mark.run_loop
+async def test_batch(es, loop):
+    results = await asyncio.gather(
+        es.get('index', '1'),
+        es.get('other', '1'),
+        es.get('index', '1'),
+        loop=loop
+    )
+
+    assert results == [
+        DOCS['index', '1'], DOCS['other', '1'], DOCS['index', '1'],
+    ]
+    assert es.mget_calls == [
+        ({'docs': [
+            {'_index': 'index', '_id': '1'},
+            {'_index': 'other', '_id': '1'},
+            {'_index': 'index', '_id': '1'},
+        ]}, {}),
+    ]
+
+
+@pytest.mark.run_loop
+async def test_batch_params(es, loop):
+    await asyncio.gather(
+        es.get('index', '1', routing='a'),
+        es.get('other', '1', routing='a'),
+        es.get('index', '1', routing='b', ignore=404),
+        loop=loop
+    )
+
+    assert sorted(
+        (params['routing'], len(body['docs']))
+        for body, params in es.mget_calls
+    ) == [(b'a', 2), (b'b', 1)]
+    # ignore is applied per call
+    for _, params in es.mget_calls:
+        assert 'ignore' not in params
+
+
+@pytest.mark.run_loop
+async def test_batch_max_size(es, loop):
+    es.get_batcher.max_size = 2
+
+    await asyncio.gather(*[es.get('index', '1') for _ in range(5)],
+                         loop=loop)
+
+    assert [len(body['docs']) for body, _ in es.mget_calls] == [2, 2, 1]
+
+
+@pytest.mark.run_loop
+async def test_batch_window(es, loop):
+    es.get_batcher.window = .01
+
+    first = asyncio.ensure_future(es.get('index', '1'), loop=loop)
+    await asyncio.sleep(0, loop=loop)
+    second = asyncio.ensure_future(es.get('other', '1'), loop=loop)
+
+    await asyncio.gather(first, second, loop=loop)
+
+    assert len(es.mget_calls) == 1
+
+
+@pytest.mark.run_loop
+async def test_batch_not_found(es, loop):
+    results = await asyncio.gather(
+        es.get('index', '1'),
+        es.get('index', '2'),
+        es.get('missing', '1'),
+        es.get('broken', '1'),
+        loop=loop,
+        return_exceptions=True
+    )
+
+    assert results[0] == DOCS['index', '1']
+
+    assert isinstance(results[1], NotFoundError)
+    assert results[1].status_code == 404
+    assert results[1].info == DOCS['index', '2']
+
+    assert isinstance(results[2], NotFoundError)
+    assert results[2].error == 'index_not_found_exception'
+
+    assert not isinstance(results[3], NotFoundError)
+    assert isinstance(results[3], TransportError)
+    assert results[3].error == 'shard_failure'
+
+    assert len(es.mget_calls) == 1
+
+
+@pytest.mark.run_loop
+async def test_batch_not_found_ignore(es, loop):
+    results = await asyncio.gather(
+        es.get('index', '2', ignore=404),
+        es.get('missing', '1', ignore=(404, )),
+        loop=loop
+    )
+
+    assert results == [DOCS['index', '2'], DOCS['missing', '1']]
+
+
+@pytest.mark.run_loop
+async def test_batch_error(es, loop):
+    exc = TransportError(503, 'Unavailable')
+    es.mget.side_effect = exc
+
+    results = await asyncio.gather(
+        es.get('index', '1'),
+        es.get('index', '2'),
+        loop=loop,
+        return_exceptions=True
+    )
+
+    assert results == [exc, exc]
+
+
+@pytest.mark.run_loop
+async def test_batch_cancel(es, loop):
+    first = asyncio.ensure_future(es.get('index', '1'), loop=loop)
+    second = asyncio.ensure_future(es.get('other', '1'), loop=loop)
+    await asyncio.sleep(0, loop=loop)
+
+    first.cancel()
+
+    assert await second == DOCS['other', '1']
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.run_loop
+async def test_not_batched(es, mocker):
+    perform_request = mocker.patch.object(es.transport, 'perform_request')
+    future = es.loop.create_future()
+    future.set_result({})
+    perform_request.return_value = future
+
+    await es.get('index', '1', version=1)
+    await es.get('index', '1', doc_type='type')
+    await es.get('index', '1', params={'stream': True})
+
+    assert es.mget_calls == []
+    assert perform_request.call_count == 3
+
+    with pytest.raises(ValueError):
+        await es.get('index', '')
+
+
+@pytest.mark.run_loop
+async def test_headers(es, loop, mocker):
+    # newer elasticsearch-py passes empty headers to every call
+    assert await es.get('index', '1', headers={}) == DOCS['index', '1']
+    assert len(es.mget_calls) == 1
+
+    get = mocker.patch('elasticsearch.Elasticsearch.get')
+    future = loop.create_future()
+    future.set_result({})
+    get.return_value = future
+
+    await es.get('index', '1', headers={'x-opaque-id': 'a'})
+
+    assert len(es.mget_calls) == 1
+    assert get.call_args[1]['headers'] == {'x-opaque-id': 'a'}
+
+
+@pytest.mark.run_loop
+async def test_close(es, loop):
+    es.get_batcher.window = 10
+
+    waiting = asyncio.ensure_future(es.get('index', '1'), loop=loop)
+    await asyncio.sleep(0, loop=loop)
+
+    await es.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert es.mget_calls == []
+
+
+@pytest.mark.run_loop
+async def test_close_in_flight(es, loop):
+    sent = loop.create_future()
+
+    async def mget(body, params):
+        sent.set_result(None)
+        await loop.create_future()
+
+    es.mget.side_effect = mget
+
+    in_flight = asyncio.ensure_future(es.get('index', '1'), loop=loop)
+    await sent
+
+    await es.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await in_flight
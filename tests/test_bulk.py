@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+
+from aioelasticsearch import Elasticsearch
+from aioelasticsearch.helpers import (BulkIndexError, bulk, parallel_bulk,
+                                      streaming_bulk)
+
+
+class AsyncActions:
+
+    def __init__(self, actions):
+        self._it = iter(actions)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):  # noqa
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.mark.run_loop
+async def test_bulk_simple(es):
+    index = 'test_aioes'
+    actions = ({'_index': index, '_id': str(i), 'foo': i} for i in range(10))
+
+    success, errors = await bulk(es, actions, refresh=True)
+
+    assert success == 10
+    assert errors == []
+    assert (await es.count(index=index))['count'] == 10
+
+
+@pytest.mark.run_loop
+async def test_bulk_async_iterable(es):
+    index = 'test_aioes'
+    actions = AsyncActions(
+        {'_index': index, '_id': str(i), 'foo': i} for i in range(10)
+    )
+
+    success, errors = await bulk(es, actions, refresh=True)
+
+    assert success == 10
+    assert errors == []
+    assert (await es.count(index=index))['count'] == 10
+
+
+@pytest.mark.run_loop
+async def test_streaming_bulk_chunk_size(es, mocker):
+    index = 'test_aioes'
+    actions = [{'_index': index, '_id': str(i), 'foo': i} for i in range(10)]
+    mocker.spy(es, 'bulk')
+
+    results = []
+    async for ok, item in streaming_bulk(es, actions, chunk_size=3):
+        results.append((ok, item['index']['_id']))
+
+    assert results == [(True, str(i)) for i in range(10)]
+    assert es.bulk.call_count == 4
+
+
+@pytest.mark.run_loop
+async def test_streaming_bulk_max_chunk_bytes(es, mocker):
+    index = 'test_aioes'
+    actions = [{'_index': index, '_id': str(i), 'foo': 'x' * 100}
+               for i in range(4)]
+    mocker.spy(es, 'bulk')
+
+    async for ok, item in streaming_bulk(es, actions, max_chunk_bytes=200):
+        assert ok
+
+    assert es.bulk.call_count == 4
+
+
+@pytest.mark.run_loop
+async def test_streaming_bulk_raise_on_error(es):
+    index = 'test_aioes'
+    await es.indices.create(
+        index,
+        body={'mappings': {'properties': {'foo': {'type': 'integer'}}}},
+    )
+    actions = [
+        {'_index': index, '_id': '1', 'foo': 1},
+        {'_index': index, '_id': '2', 'foo': 'bar'},
+    ]
+
+    with pytest.raises(BulkIndexError) as cm:
+        async for ok, item in streaming_bulk(es, actions):
+            assert ok
+
+    assert len(cm.value.errors) == 1
+    assert cm.value.errors[0]['index']['data'] == {'foo': 'bar'}
+
+
+@pytest.mark.run_loop
+async def test_bulk_stats_only(es):
+    index = 'test_aioes'
+    await es.indices.create(
+        index,
+        body={'mappings': {'properties': {'foo': {'type': 'integer'}}}},
+    )
+    actions = [
+        {'_index': index, '_id': '1', 'foo': 1},
+        {'_index': index, '_id': '2', 'foo': 'bar'},
+    ]
+
+    success, failed = await bulk(
+        es, actions, stats_only=True, raise_on_error=False,
+    )
+
+    assert success == 1
+    assert failed == 1
+
+
+@pytest.mark.run_loop
+async def test_parallel_bulk(es, mocker):
+    index = 'test_aioes'
+    actions = AsyncActions(
+        {'_index': index, '_id': str(i), 'foo': i} for i in range(10)
+    )
+    mocker.spy(es, 'bulk')
+
+    ids = set()
+    async for ok, item in parallel_bulk(
+        es, actions, chunk_size=2, concurrency=3, refresh=True,
+    ):
+        assert ok
+        ids.add(item['index']['_id'])
+
+    assert ids == {str(i) for i in range(10)}
+    assert es.bulk.call_count == 5
+    assert (await es.count(index=index))['count'] == 10
+
+
+@pytest.mark.run_loop
+async def test_parallel_bulk_raise_on_error(es):
+    index = 'test_aioes'
+    await es.indices.create(
+        index,
+        body={'mappings': {'properties': {'foo': {'type': 'integer'}}}},
+    )
+    actions = [{'_index': index, '_id': str(i), 'foo': i} for i in range(10)]
+    actions.append({'_index': index, '_id': 'bad', 'foo': 'bar'})
+
+    with pytest.raises(BulkIndexError) as cm:
+        async for ok, item in parallel_bulk(es, actions, chunk_size=2):
+            assert ok
+
+    assert len(cm.value.errors) == 1
+
+
+@pytest.mark.run_loop
+async def test_parallel_bulk_aclose(loop, auto_close, mocker):
+    es = auto_close(Elasticsearch(loop=loop))
+    calls = []
+
+    async def bulk(body, **kwargs):
+        calls.append(body)
+        if len(calls) > 1:
+            await asyncio.Event(loop=loop).wait()
+        return {'items': [{'index': {'_id': '1', 'status': 201}}]}
+
+    mocker.patch.object(es, 'bulk', side_effect=bulk)
+    actions = ({'_index': 'index', '_id': str(i)} for i in range(10))
+
+    async with parallel_bulk(es, actions, chunk_size=1,
+                             concurrency=2) as results:
+        async for ok, item in results:
+            assert ok
+            break
+
+        tasks = results._tasks
+
+    assert tasks
+    assert all(task.done() for task in tasks)
+
+    with pytest.raises(StopAsyncIteration):
+        await results.__anext__()
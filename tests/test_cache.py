@@ -0,0 +1,75 @@
+from aioelasticsearch import ResponseCache
+
+
+class Loop:
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+
+def test_get_set():
+    cache = ResponseCache(loop=Loop())
+
+    assert cache.get('a') is None
+    cache.set('a', 'value', 5)
+
+    assert cache.get('a') == 'value'
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.size == 5
+
+    cache.set('a', 'other', 3)
+    assert cache.get('a') == 'other'
+    assert cache.size == 3
+
+
+def test_ttl():
+    loop = Loop()
+    cache = ResponseCache(ttl=10, loop=loop)
+    cache.set('a', 'value', 5)
+
+    loop.now = 9
+    assert cache.get('a') == 'value'
+
+    loop.now = 10
+    assert cache.get('a') is None
+    assert cache.size == 0
+    assert len(cache) == 0
+
+
+def test_lru():
+    cache = ResponseCache(max_size=10, loop=Loop())
+    cache.set('a', 1, 4)
+    cache.set('b', 2, 4)
+
+    # a is used after b
+    assert cache.get('a') == 1
+
+    cache.set('c', 3, 4)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.size == 8
+    assert cache.evictions == 1
+
+
+def test_too_large():
+    cache = ResponseCache(max_size=10, loop=Loop())
+    cache.set('a', 1, 4)
+    cache.set('b', 2, 11)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+
+def test_clear():
+    cache = ResponseCache(loop=Loop())
+    cache.set('a', 1, 4)
+
+    cache.clear()
+
+    assert cache.get('a') is None
+    assert cache.size == 0
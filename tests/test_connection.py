@@ -1,13 +1,16 @@
 import asyncio
+import gzip
+import logging
 import ssl
 from unittest import mock
 
 import aiohttp
 import pytest
-from elasticsearch import ConnectionTimeout
+from elasticsearch import ConnectionTimeout, NotFoundError
 
 from aioelasticsearch.connection import (AIOHttpConnection, ConnectionError,
                                          SSLError)
+from aioelasticsearch.metrics import TransportMetrics
 
 
 @pytest.mark.run_loop
@@ -114,3 +117,291 @@ async def test_perform_request_ssl_error(auto_close, loop):
                                             use_ssl=True))
         with pytest.raises(expected):
             await conn.perform_request('HEAD', '/')
+
+
+@pytest.mark.run_loop
+async def test_perform_request_decode_response(auto_close, loop, es_server):
+    conn = auto_close(AIOHttpConnection(host=es_server['host'],
+                                        port=es_server['port'],
+                                        http_auth=es_server['auth'],
+                                        loop=loop))
+    _, _, data = await conn.perform_request('GET', '/')
+    assert isinstance(data, str)
+
+
+@pytest.mark.run_loop
+async def test_perform_request_raw_bytes(auto_close, loop, es_server):
+    conn = auto_close(AIOHttpConnection(host=es_server['host'],
+                                        port=es_server['port'],
+                                        http_auth=es_server['auth'],
+                                        decode_response=False,
+                                        loop=loop))
+    _, _, data = await conn.perform_request('GET', '/')
+    assert isinstance(data, bytes)
+
+
+@pytest.mark.run_loop
+async def test_perform_request_raw_bytes_error(auto_close, loop, es_server):
+    conn = auto_close(AIOHttpConnection(host=es_server['host'],
+                                        port=es_server['port'],
+                                        http_auth=es_server['auth'],
+                                        decode_response=False,
+                                        loop=loop))
+    with pytest.raises(NotFoundError) as cm:
+        await conn.perform_request('GET', '/undefined/_doc/1')
+    assert isinstance(cm.value.error, str)
+
+
+@pytest.mark.run_loop
+async def test_http_compress_headers(auto_close, loop):
+    conn = auto_close(AIOHttpConnection(http_compress=True, loop=loop))
+    assert conn.headers == {'Content-Type': 'application/json',
+                            'Accept-Encoding': 'gzip,deflate'}
+
+
+@pytest.mark.run_loop
+async def test_http_compress_body(auto_close, loop):
+    for threshold in [None, 0]:
+        session = aiohttp.ClientSession(loop=loop)
+        calls = []
+
+        async def coro(*args, **kwargs):
+            calls.append(kwargs)
+            raise aiohttp.ClientError('Other')
+
+        session._request = coro
+
+        conn = auto_close(AIOHttpConnection(
+            session=session,
+            http_compress=True,
+            http_compress_executor_threshold=threshold,
+            loop=loop,
+        ))
+        with pytest.raises(ConnectionError):
+            await conn.perform_request('POST', '/', body=b'{"a":1}')
+
+        kwargs = calls[0]
+        assert gzip.decompress(kwargs['data']) == b'{"a":1}'
+        assert kwargs['headers']['Content-Encoding'] == 'gzip'
+        assert 'Content-Encoding' not in conn.headers
+
+
+@pytest.mark.run_loop
+async def test_http_compress_request(auto_close, loop, es_server):
+    conn = auto_close(AIOHttpConnection(host=es_server['host'],
+                                        port=es_server['port'],
+                                        http_auth=es_server['auth'],
+                                        http_compress=True,
+                                        loop=loop))
+    status, headers, _ = await conn.perform_request(
+        'POST', '/_search', body=b'{"query":{"match_all":{}}}',
+    )
+    assert status == 200
+
+
+@pytest.mark.run_loop
+async def test_perform_request_metrics_error(auto_close, loop):
+    session = aiohttp.ClientSession(loop=loop)
+
+    async def coro(*args, **kwargs):
+        raise asyncio.TimeoutError
+
+    session._request = coro
+
+    metrics = TransportMetrics()
+    conn = auto_close(AIOHttpConnection(session=session, metrics=metrics,
+                                        loop=loop))
+    with pytest.raises(ConnectionTimeout):
+        await conn.perform_request('POST', '/index/_search', body=b'{}')
+
+    [series] = metrics.snapshot()
+    assert series['node'] == 'http://localhost:9200'
+    assert series['endpoint'] == 'POST /*/_search'
+    assert series['statuses'] == {'TIMEOUT': 1}
+    assert series['bytes_sent'] == 2
+    assert series['bytes_received'] == 0
+
+
+@pytest.mark.run_loop
+async def test_perform_request_metrics(auto_close, loop, es_server):
+    metrics = TransportMetrics()
+    conn = auto_close(AIOHttpConnection(host=es_server['host'],
+                                        port=es_server['port'],
+                                        http_auth=es_server['auth'],
+                                        metrics=metrics,
+                                        loop=loop))
+    _, _, data = await conn.perform_request('GET', '/')
+
+    with pytest.raises(NotFoundError):
+        await conn.perform_request('GET', '/undefined/_doc/1')
+
+    info, doc = metrics.snapshot()
+    assert info['endpoint'] == 'GET /'
+    assert info['statuses'] == {200: 1}
+    assert info['bytes_received'] == len(data.encode('utf-8'))
+    assert info['latency']['count'] == 1
+    assert doc['endpoint'] == 'GET /*/_doc/*'
+    assert doc['statuses'] == {404: 1}
+
+
+@pytest.mark.run_loop
+async def test_trace_requests_session(auto_close, loop):
+    conn = auto_close(AIOHttpConnection(trace_requests=True, loop=loop))
+    assert len(conn.session.trace_configs) == 1
+
+
+@pytest.mark.run_loop
+async def test_perform_request_trace(auto_close, loop, es_server):
+    metrics = TransportMetrics()
+    conn = auto_close(AIOHttpConnection(host=es_server['host'],
+                                        port=es_server['port'],
+                                        http_auth=es_server['auth'],
+                                        trace_requests=True,
+                                        metrics=metrics,
+                                        loop=loop))
+    await conn.perform_request('GET', '/')
+    await conn.perform_request('GET', '/')
+
+    [series] = metrics.snapshot()
+    assert series['phases']['connect']['count'] == 1
+    assert series['phases']['server']['count'] == 2
+    assert series['phases']['body']['count'] == 2
+
+
+@pytest.mark.run_loop
+async def test_perform_request_in_flight_and_latency(auto_close, loop):
+    session = aiohttp.ClientSession(loop=loop)
+    started = asyncio.Event(loop=loop)
+    finish = asyncio.Event(loop=loop)
+
+    async def coro(*args, **kwargs):
+        started.set()
+        await finish.wait()
+        raise aiohttp.ClientError('Other')
+
+    session._request = coro
+
+    conn = auto_close(AIOHttpConnection(session=session, loop=loop))
+    assert conn.in_flight == 0
+    assert conn.latency_ewma is None
+
+    request = asyncio.ensure_future(conn.perform_request('GET', '/'),
+                                    loop=loop)
+    await started.wait()
+    assert conn.in_flight == 1
+
+    finish.set()
+    with pytest.raises(ConnectionError):
+        await request
+
+    assert conn.in_flight == 0
+    # failed requests don't count into the latency
+    assert conn.latency_ewma is None
+
+
+@pytest.mark.run_loop
+async def test_perform_request_latency(auto_close, loop, mocker):
+    conn = auto_close(AIOHttpConnection(session=object(), loop=loop))
+    started = asyncio.Event(loop=loop)
+
+    async def perform_request(*args):
+        started.set()
+        await asyncio.sleep(.01, loop=loop)
+        return 200, {}, ''
+
+    mocker.patch.object(conn, '_perform_request', side_effect=perform_request)
+
+    request = asyncio.ensure_future(conn.perform_request('GET', '/'),
+                                    loop=loop)
+    await started.wait()
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+    assert conn.in_flight == 0
+    assert conn.latency_ewma is None
+
+    assert await conn.perform_request('GET', '/') == (200, {}, '')
+    assert conn.in_flight == 0
+    assert conn.latency_ewma >= .01
+
+
+def test_update_latency(loop):
+    conn = AIOHttpConnection(session=object(), latency_ewma_alpha=.5,
+                             loop=loop)
+
+    conn._update_latency(1)
+    assert conn.latency_ewma == 1
+
+    conn._update_latency(3)
+    assert conn.latency_ewma == 2
+
+
+@pytest.mark.run_loop
+async def test_perform_request_auth(auto_close, loop):
+    session = aiohttp.ClientSession(loop=loop)
+    calls = []
+
+    async def coro(*args, **kwargs):
+        calls.append(kwargs)
+        raise aiohttp.ClientError('Other')
+
+    session._request = coro
+
+    conn = auto_close(AIOHttpConnection(session=session, http_auth='u:p',
+                                        loop=loop))
+    auto_close(session)
+
+    with pytest.raises(ConnectionError):
+        await conn.perform_request('GET', '/')
+
+    assert calls[0]['auth'] == aiohttp.BasicAuth('u', 'p')
+
+
+@pytest.mark.run_loop
+async def test_warmup(loop, mocker):
+    conn = AIOHttpConnection(session=object(), loop=loop)
+    calls = []
+
+    async def perform_request(method, url, *args):
+        calls.append((method, url))
+        if len(calls) == 2:
+            raise ConnectionError('N/A', 'Connection refused', None)
+        return 200, {}, ''
+
+    mocker.patch.object(conn, '_perform_request', side_effect=perform_request)
+
+    assert await conn.warmup(3) == 2
+    assert calls == [('HEAD', '/')] * 3
+    assert conn.in_flight == 0
+    assert conn.latency_ewma is None
+
+
+@pytest.mark.run_loop
+async def test_perform_request_stream_trace(auto_close, loop, mocker):
+    tracer = logging.getLogger('elasticsearch.trace')
+    level = tracer.level
+    handler = logging.NullHandler()
+    tracer.addHandler(handler)
+    tracer.setLevel(logging.DEBUG)
+
+    response = mock.Mock(status=200, headers={})
+
+    async def request(*args, **kwargs):
+        return response
+
+    session = mock.Mock(request=request)
+    conn = auto_close(AIOHttpConnection(session=session, loop=loop))
+    mocker.spy(conn, '_log_trace')
+
+    try:
+        status, headers, data = await conn.perform_request(
+            'POST', '/index/_search', body=b'{}', stream=True,
+        )
+    finally:
+        tracer.removeHandler(handler)
+        tracer.setLevel(level)
+
+    assert data is response
+    assert not response.release.called
+    assert conn._log_trace.call_args[0][4] == '<streamed>'
@@ -0,0 +1,192 @@
+import pytest
+
+from aioelasticsearch.metrics import Histogram, TransportMetrics, endpoint
+
+
+@pytest.mark.parametrize('method,path,expected', [
+    ('GET', '/', 'GET /'),
+    ('GET', '', 'GET /'),
+    ('POST', '/index/_search', 'POST /*/_search'),
+    ('POST', '/index-2019.11.07/_search?size=10', 'POST /*/_search'),
+    ('PUT', '/index/_doc/123', 'PUT /*/_doc/*'),
+    ('GET', '/index/_doc/_foo', 'GET /*/_doc/*'),
+    ('POST', '/index/_update/_bar', 'POST /*/_update/*'),
+    ('GET', '/index/_source/_baz', 'GET /*/_source/*'),
+    ('GET', '/_search/scroll/_scroll_id', 'GET /_search/scroll/*'),
+    ('POST', '/_search/scroll', 'POST /_search/scroll'),
+    ('DELETE', '/_search/scroll', 'DELETE /_search/scroll'),
+    ('GET', '/_nodes/_all/http', 'GET /_nodes/_all/http'),
+    ('GET', '/_cluster/health/index', 'GET /_cluster/health/*'),
+    ('GET', '/_tasks/node:123', 'GET /_tasks/*'),
+    ('POST', '/index,other/_bulk', 'POST /*/_bulk'),
+])
+def test_endpoint(method, path, expected):
+    assert endpoint(method, path) == expected
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, .1))
+
+    for value in (.05, .1, .5, 2):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+    assert histogram.cumulative() == [(.1, 2), (1, 3), (float('inf'), 4)]
+
+
+def test_snapshot():
+    metrics = TransportMetrics(buckets=(.1, 1))
+
+    metrics.observe_request('http://a:9200', 'GET', '/i/_doc/1', 200, .05,
+                            bytes_received=10, phases={'server': .04})
+    metrics.observe_request('http://a:9200', 'GET', '/i/_doc/2', 404, .5,
+                            bytes_received=5)
+    metrics.observe_request('http://b:9200', 'GET', '/i/_doc/1', 'N/A', 2,
+                            bytes_sent=3)
+    metrics.observe_retry('http://b:9200', 'GET', '/i/_doc/1')
+
+    assert metrics.snapshot() == [
+        {
+            'node': 'http://a:9200',
+            'endpoint': 'GET /*/_doc/*',
+            'requests': 2,
+            'statuses': {200: 1, 404: 1},
+            'retries': 0,
+            'bytes_sent': 0,
+            'bytes_received': 15,
+            'latency': {
+                'count': 2,
+                'sum': .55,
+                'buckets': [(.1, 1), (1, 2), (float('inf'), 2)],
+            },
+            'phases': {
+                'server': {
+                    'count': 1,
+                    'sum': .04,
+                    'buckets': [(.1, 1), (1, 1), (float('inf'), 1)],
+                },
+            },
+        },
+        {
+            'node': 'http://b:9200',
+            'endpoint': 'GET /*/_doc/*',
+            'requests': 1,
+            'statuses': {'N/A': 1},
+            'retries': 1,
+            'bytes_sent': 3,
+            'bytes_received': 0,
+            'latency': {
+                'count': 1,
+                'sum': 2,
+                'buckets': [(.1, 0), (1, 0), (float('inf'), 1)],
+            },
+            'phases': {},
+        },
+    ]
+
+    metrics.reset()
+
+    assert metrics.snapshot() == []
+
+
+def test_to_prometheus():
+    metrics = TransportMetrics(buckets=(.1, ))
+
+    metrics.observe_request('http://a:9200', 'GET', '/i/_search', 200, .05,
+                            bytes_sent=2, bytes_received=10,
+                            phases={'server': .03, 'queue': .5})
+    metrics.observe_request('http://a:9200', 'GET', '/i/_search', 'N/A', .5)
+    metrics.observe_retry('http://a:9200', 'GET', '/i/_search')
+
+    labels = 'node="http://a:9200",endpoint="GET /*/_search"'
+
+    assert metrics.to_prometheus(namespace='es').splitlines() == [
+        '# HELP es_request_duration_seconds Request latency in seconds.',
+        '# TYPE es_request_duration_seconds histogram',
+        'es_request_duration_seconds_bucket{' + labels + ',le="0.1"} 1',
+        'es_request_duration_seconds_bucket{' + labels + ',le="+Inf"} 2',
+        'es_request_duration_seconds_sum{' + labels + '} 0.55',
+        'es_request_duration_seconds_count{' + labels + '} 2',
+        '# HELP es_request_phase_duration_seconds '
+        'Request phase latency in seconds.',
+        '# TYPE es_request_phase_duration_seconds histogram',
+        'es_request_phase_duration_seconds_bucket{' + labels +
+        ',phase="queue",le="0.1"} 0',
+        'es_request_phase_duration_seconds_bucket{' + labels +
+        ',phase="queue",le="+Inf"} 1',
+        'es_request_phase_duration_seconds_sum{' + labels +
+        ',phase="queue"} 0.5',
+        'es_request_phase_duration_seconds_count{' + labels +
+        ',phase="queue"} 1',
+        'es_request_phase_duration_seconds_bucket{' + labels +
+        ',phase="server",le="0.1"} 1',
+        'es_request_phase_duration_seconds_bucket{' + labels +
+        ',phase="server",le="+Inf"} 1',
+        'es_request_phase_duration_seconds_sum{' + labels +
+        ',phase="server"} 0.03',
+        'es_request_phase_duration_seconds_count{' + labels +
+        ',phase="server"} 1',
+        '# HELP es_requests_total Requests by response status.',
+        '# TYPE es_requests_total counter',
+        'es_requests_total{' + labels + ',status="200"} 1',
+        'es_requests_total{' + labels + ',status="N/A"} 1',
+        '# HELP es_retries_total Requests retried on another connection.',
+        '# TYPE es_retries_total counter',
+        'es_retries_total{' + labels + '} 1',
+        '# HELP es_request_bytes_total Bytes of request bodies sent.',
+        '# TYPE es_request_bytes_total counter',
+        'es_request_bytes_total{' + labels + '} 2',
+        '# HELP es_response_bytes_total Bytes of response bodies received.',
+        '# TYPE es_response_bytes_total counter',
+        'es_response_bytes_total{' + labels + '} 10',
+    ]
+
+
+def test_to_prometheus_escapes_labels():
+    metrics = TransportMetrics(buckets=())
+
+    metrics.observe_request('a"b\\c\n', 'GET', '/', 200, 1)
+
+    assert 'node="a\\"b\\\\c\\n"' in metrics.to_prometheus()
+
+
+def test_histogram_quantile():
+    histogram = Histogram(buckets=(.1, 1))
+
+    assert histogram.quantile(.5) is None
+
+    for value in (.05, .05, .5, 2):
+        histogram.observe(value)
+
+    assert histogram.quantile(.5) == .1
+    assert histogram.quantile(.75) == 1
+    # interpolated within the bucket
+    assert histogram.quantile(.25) == pytest.approx(.05)
+    assert histogram.quantile(.625) == pytest.approx(.55)
+    # above all the buckets
+    assert histogram.quantile(.95) == 1
+
+
+def test_histogram_quantile_empty_bucket():
+    histogram = Histogram(buckets=(.1, .5, 1))
+    histogram.observe(.3)
+
+    assert histogram.quantile(0) == 0
+    assert histogram.quantile(.5) == pytest.approx(.3)
+    assert histogram.quantile(1) == .5
+
+
+def test_quantile():
+    metrics = TransportMetrics(buckets=(.1, 1))
+
+    metrics.observe_request('http://a:9200', 'GET', '/i/_doc/1', 200, .05)
+    metrics.observe_request('http://b:9200', 'GET', '/i/_doc/2', 200, .5)
+    metrics.observe_request('http://b:9200', 'GET', '/i/_search', 200, 2)
+
+    assert metrics.quantile('GET', '/j/_doc/3', .5) == .1
+    assert metrics.quantile('GET', '/j/_doc/3', .9) == pytest.approx(.82)
+    assert metrics.quantile('GET', '/_cat/health', .9) is None
+
+    metrics.reset()
+    assert metrics.quantile('GET', '/j/_doc/3', .5) is None
@@ -1,7 +1,11 @@
+from functools import partial
+
 import pytest
 
-from aioelasticsearch import (AIOHttpConnectionPool, Elasticsearch,
-                              ImproperlyConfigured)
+from aioelasticsearch import (AIOHttpConnectionPool, ConnectionError,
+                              Elasticsearch, EWMASelector,
+                              ImproperlyConfigured, LeastOutstandingSelector,
+                              PowerOfTwoChoicesSelector, ZoneAwareSelector)
 from aioelasticsearch.pool import DummyConnectionPool
 
 
@@ -147,3 +151,260 @@ async def test_dummy_mark_dead_and_live(loop):
 
     pool.resurrect()
     assert pool.connections == [conn1]
+
+
+class Connection:
+
+    def __init__(self, in_flight=0, latency_ewma=None):
+        self.in_flight = in_flight
+        self.latency_ewma = latency_ewma
+
+
+def test_least_outstanding_selector():
+    conn1 = Connection(in_flight=2)
+    conn2 = Connection(in_flight=1)
+    conn3 = Connection(in_flight=3)
+    selector = LeastOutstandingSelector({})
+
+    assert selector.select([conn1, conn2, conn3]) is conn2
+
+    conn1.in_flight = 1
+    selected = {selector.select([conn1, conn2, conn3]) for _ in range(100)}
+    assert selected == {conn1, conn2}
+
+
+def test_ewma_selector():
+    conn1 = Connection(latency_ewma=.1)
+    conn2 = Connection(latency_ewma=.3)
+    selector = EWMASelector({})
+
+    assert selector.select([conn1, conn2]) is conn1
+
+    # .1 * 4 > .3 * 1
+    conn1.in_flight = 3
+    assert selector.select([conn1, conn2]) is conn2
+
+
+def test_ewma_selector_without_latency():
+    conn1 = Connection(latency_ewma=.1)
+    conn2 = Connection()
+    selector = EWMASelector({})
+
+    assert selector.select([conn1, conn2]) is conn2
+
+    conn2.in_flight = 1
+    assert selector.select([conn1, conn2]) is conn1
+
+
+def test_power_of_two_choices_selector():
+    conn1 = Connection(in_flight=5)
+    conn2 = Connection(in_flight=0)
+    selector = PowerOfTwoChoicesSelector({})
+
+    assert selector.select([conn1]) is conn1
+    assert selector.select([conn1, conn2]) is conn2
+
+    conn1.in_flight = 0
+    conn1.latency_ewma = .2
+    conn2.latency_ewma = .1
+    assert selector.select([conn1, conn2]) is conn2
+
+    conn3 = Connection(in_flight=10)
+    selected = {
+        selector.select([conn1, conn2, conn3]) for _ in range(100)
+    }
+    assert conn3 not in selected
+
+
+@pytest.mark.run_loop
+async def test_pool_selector_class(loop):
+    conn1 = Connection(in_flight=1)
+    conn2 = Connection(in_flight=0)
+    conns = [(conn1, {}), (conn2, {})]
+    pool = AIOHttpConnectionPool(connections=conns,
+                                 selector_class=LeastOutstandingSelector,
+                                 loop=loop)
+    assert pool.get_connection() is conn2
+
+
+class ZoneConnection(Connection):
+
+    def __init__(self, zone, in_flight=0):
+        super().__init__(in_flight=in_flight)
+        self.zone = zone
+
+
+def zone_opts(*connections):
+    return {
+        connection: {'attributes': {'zone': connection.zone}}
+        for connection in connections
+    }
+
+
+def test_zone_aware_selector():
+    local1 = ZoneConnection('a')
+    local2 = ZoneConnection('a')
+    remote = ZoneConnection('b')
+    selector = ZoneAwareSelector(zone_opts(local1, local2, remote), zone='a')
+
+    selected = {
+        selector.select([local1, local2, remote]) for _ in range(10)
+    }
+    assert selected == {local1, local2}
+
+    # local nodes are dead
+    assert selector.select([remote]) is remote
+
+
+def test_zone_aware_selector_saturated():
+    local = ZoneConnection('a', in_flight=5)
+    remote1 = ZoneConnection('b', in_flight=5)
+    remote2 = ZoneConnection('c', in_flight=1)
+    selector = ZoneAwareSelector(zone_opts(local, remote1, remote2),
+                                 zone='a', max_in_flight=5,
+                                 selector_class=LeastOutstandingSelector)
+
+    assert selector.select([local, remote1, remote2]) is remote2
+
+    local.in_flight = 4
+    assert selector.select([local, remote1, remote2]) is local
+
+    # all saturated
+    local.in_flight = remote2.in_flight = 5
+    assert selector.select([local, remote1]) in (local, remote1)
+
+
+def test_zone_aware_selector_attribute():
+    local = ZoneConnection('a')
+    remote = ZoneConnection('b')
+    opts = {
+        local: {'attributes': {'rack': 'r1'}},
+        remote: {},
+    }
+    selector = ZoneAwareSelector(opts, zone='r1', attribute='rack')
+
+    for _ in range(10):
+        assert selector.select([remote, local]) is local
+
+
+@pytest.mark.run_loop
+async def test_pool_zone_aware_selector(loop):
+    local = ZoneConnection('a')
+    remote = ZoneConnection('b')
+    conns = list(zone_opts(local, remote).items())
+    pool = AIOHttpConnectionPool(
+        connections=conns,
+        selector_class=partial(ZoneAwareSelector, zone='a'),
+        loop=loop,
+    )
+    assert pool.get_connection() is local
+
+    pool.mark_dead(local)
+    assert pool.get_connection() is remote
+
+
+class PingConnection:
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.pings = 0
+
+    async def perform_request(self, method, url, timeout=None):
+        assert (method, url) == ('HEAD', '/')
+        self.pings += 1
+        if not self.alive:
+            raise ConnectionError('N/A', 'Connection refused', None)
+        return 200, {}, ''
+
+
+@pytest.mark.run_loop
+async def test_ping_dead(loop):
+    conn1 = PingConnection()
+    conn2 = PingConnection(alive=False)
+    conns = [(conn1, object()), (conn2, object())]
+    pool = AIOHttpConnectionPool(connections=conns, dead_timeout=0,
+                                 randomize_hosts=False, loop=loop)
+    pool.mark_dead(conn1)
+    pool.mark_dead(conn2)
+
+    assert await pool.ping_dead() == 0
+
+    assert pool.connections == [conn1]
+    assert conn1 not in pool.dead_count
+    assert pool.dead_count[conn2] == 2
+    assert (conn1.pings, conn2.pings) == (1, 1)
+
+
+@pytest.mark.run_loop
+async def test_ping_dead_same_time(loop):
+    conn1 = PingConnection(alive=False)
+    conn2 = PingConnection(alive=False)
+    conns = [(conn1, object()), (conn2, object())]
+    pool = AIOHttpConnectionPool(connections=conns, dead_timeout=0,
+                                 randomize_hosts=False, loop=loop)
+    pool.mark_dead(conn1)
+    pool.mark_dead(conn2)
+
+    # both fail the same round and are put back with the same timestamp
+    assert await pool.ping_dead() == 0
+    assert await pool.ping_dead() == 0
+
+    assert pool.connections == []
+    assert pool.dead.qsize() == 2
+    assert (pool.dead_count[conn1], pool.dead_count[conn2]) == (3, 3)
+    assert (conn1.pings, conn2.pings) == (2, 2)
+
+
+@pytest.mark.run_loop
+async def test_ping_dead_not_due(loop):
+    conn1 = PingConnection()
+    conn2 = PingConnection()
+    conns = [(conn1, object()), (conn2, object())]
+    pool = AIOHttpConnectionPool(connections=conns,
+                                 randomize_hosts=False, loop=loop)
+
+    assert await pool.ping_dead() is None
+
+    pool.mark_dead(conn1)
+
+    assert 59 < await pool.ping_dead() <= 60
+    assert pool.connections == [conn2]
+    assert conn1.pings == 0
+
+
+@pytest.mark.run_loop
+async def test_ping_dead_force(loop):
+    conn1 = PingConnection(alive=False)
+    conn2 = PingConnection()
+    conns = [(conn1, object()), (conn2, object())]
+    pool = AIOHttpConnectionPool(connections=conns,
+                                 randomize_hosts=False, loop=loop)
+    pool.mark_dead(conn1)
+    pool.mark_dead(conn2)
+
+    assert 59 < await pool.ping_dead(force=True) <= 60
+
+    assert pool.connections == [conn2]
+    # the failed one keeps its backoff schedule
+    assert pool.dead_count[conn1] == 1
+    assert conn1.pings == 1
+
+
+@pytest.mark.run_loop
+async def test_get_connection_health_check(loop):
+    conn1 = PingConnection()
+    conn2 = PingConnection()
+    conns = [(conn1, object()), (conn2, object())]
+    pool = AIOHttpConnectionPool(connections=conns, dead_timeout=0,
+                                 randomize_hosts=False, health_check=True,
+                                 loop=loop)
+    pool.mark_dead(conn1)
+
+    # due connections aren't resurrected without a ping
+    assert pool.get_connection() is conn2
+    assert pool.connections == [conn2]
+
+    pool.mark_dead(conn2)
+
+    with pytest.raises(ConnectionError):
+        pool.get_connection()
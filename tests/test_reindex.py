@@ -0,0 +1,57 @@
+import pytest
+
+from aioelasticsearch.helpers import reindex
+
+
+@pytest.mark.run_loop
+async def test_reindex_simple(es, populate):
+    await populate('test_aioes', 10, {'foo': 1})
+
+    success, failed = await reindex(
+        es, 'test_aioes', 'test_aioes_2', chunk_size=3,
+    )
+    await es.indices.refresh()
+
+    assert (success, failed) == (10, 0)
+    assert (await es.count(index='test_aioes_2'))['count'] == 10
+
+
+@pytest.mark.run_loop
+async def test_reindex_transform(es, populate):
+    await populate('test_aioes', 10, {'foo': 1})
+
+    def transform(hit):
+        if hit['_id'] == '0':
+            return None
+        hit['_source']['bar'] = 2
+        return hit
+
+    success, failed = await reindex(
+        es, 'test_aioes', 'test_aioes_2', transform=transform,
+    )
+    await es.indices.refresh()
+
+    assert (success, failed) == (9, 0)
+    doc = await es.get(index='test_aioes_2', id='1')
+    assert doc['_source'] == {'foo': 1, 'bar': 2}
+    assert not await es.exists(index='test_aioes_2', id='0')
+
+
+@pytest.mark.run_loop
+async def test_reindex_async_transform(es, populate):
+    await populate('test_aioes', 10, {'foo': 1})
+
+    async def transform(hit):
+        hit['_source']['bar'] = 2
+        return hit
+
+    success, failed = await reindex(
+        es, 'test_aioes', 'test_aioes_2', transform=transform,
+        scan_kwargs={'size': 3, 'prefetch': 1},
+        bulk_kwargs={'concurrency': 2},
+    )
+    await es.indices.refresh()
+
+    assert (success, failed) == (10, 0)
+    doc = await es.get(index='test_aioes_2', id='1')
+    assert doc['_source'] == {'foo': 1, 'bar': 2}
@@ -0,0 +1,66 @@
+import pytest
+
+from aioelasticsearch import RetryBudget
+from aioelasticsearch.retry import backoff
+
+
+class Loop:
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+
+@pytest.mark.parametrize('attempt,upper', [(1, .1), (2, .2), (3, .4), (9, 1)])
+def test_backoff(attempt, upper):
+    delays = [backoff(attempt, .1, 1) for _ in range(100)]
+
+    assert all(0 <= delay <= upper for delay in delays)
+    # full jitter spreads the delays over the whole range
+    assert min(delays) < upper / 2 < max(delays)
+
+
+def test_retry_budget():
+    loop = Loop()
+    budget = RetryBudget(ratio=.5, min_per_second=0, max_tokens=2, loop=loop)
+
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+
+def test_retry_budget_max_tokens():
+    loop = Loop()
+    budget = RetryBudget(ratio=1, min_per_second=0, max_tokens=1, loop=loop)
+
+    for _ in range(10):
+        budget.deposit()
+
+    assert budget.tokens == 1
+
+
+def test_retry_budget_min_per_second():
+    loop = Loop()
+    budget = RetryBudget(ratio=0, min_per_second=2, max_tokens=5, loop=loop)
+
+    for _ in range(5):
+        assert budget.withdraw()
+    assert not budget.withdraw()
+
+    loop.now = .5
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    loop.now = 100
+    assert budget.tokens == 0
+    budget.deposit()
+    assert budget.tokens == 5
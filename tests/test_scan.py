@@ -1,14 +1,48 @@
+import asyncio
 import logging
 from unittest import mock
 
 import pytest
 
-from aioelasticsearch import NotFoundError
-from aioelasticsearch.helpers import Scan, ScanError
+from aioelasticsearch import Elasticsearch, NotFoundError, TransportError
+from aioelasticsearch.helpers import (PointInTimeScan, Scan, ScanError,
+                                      SlicedScan)
 
 logger = logging.getLogger('elasticsearch')
 
 
+def page(scroll_id, n=1):
+    return {
+        '_scroll_id': scroll_id,
+        '_shards': {'total': 1, 'successful': 1},
+        'hits': {
+            'total': {'value': 100, 'relation': 'eq'},
+            'hits': [{'_id': str(i)} for i in range(n)],
+        },
+    }
+
+
+@pytest.fixture
+def fake_es(loop, auto_close, mocker):
+    # endless scrolls without a server
+    es = auto_close(Elasticsearch(loop=loop))
+
+    async def search(body=None, **kwargs):
+        return page('sid{}'.format(body.get('slice', {}).get('id', '')))
+
+    async def scroll(scroll_id, **kwargs):
+        return page(scroll_id)
+
+    async def clear_scroll(**kwargs):
+        return {}
+
+    mocker.patch.object(es, 'search', side_effect=search)
+    mocker.patch.object(es, 'scroll', side_effect=scroll)
+    mocker.patch.object(es, 'clear_scroll', side_effect=clear_scroll)
+
+    return es
+
+
 def test_scan_total_without_context_manager(es):
     scan = Scan(es)
 
@@ -211,3 +245,240 @@ async def test_scan_exception_on_failed_shards(es, populate, mocker):
     assert i == 6
     logger.warning.assert_called_once_with(
         'Scroll request has only succeeded on %d shards out of %d.', 4, 5)
+
+
+@pytest.mark.run_loop
+async def test_sliced_scan_simple(es, populate):
+    index = 'test_aioes'
+    scroll_size = 3
+    n = 10
+
+    body = {'foo': 1}
+    await populate(index, n, body)
+    ids = set()
+
+    async with SlicedScan(
+        es,
+        index=index,
+        slices=2,
+        size=scroll_size,
+    ) as scan:
+        assert len(scan.scroll_ids) == 2
+        assert scan.total == {'value': 10, 'relation': 'eq'}
+        async for doc in scan:
+            ids.add(doc['_id'])
+
+    assert ids == {str(i) for i in range(10)}
+
+
+@pytest.mark.run_loop
+async def test_sliced_scan_async_for_without_context_manager(es):
+    scan = SlicedScan(es)
+
+    with pytest.raises(RuntimeError):
+        async for doc in scan:
+            doc
+
+
+@pytest.mark.run_loop
+async def test_sliced_scan_clear_scroll(es, populate, mocker):
+    index = 'test_aioes'
+    await populate(index, 10, {'foo': 1})
+
+    mocker.spy(es, 'clear_scroll')
+
+    async with SlicedScan(es, index=index, slices=3, size=1) as scan:
+        scroll_ids = scan.scroll_ids
+        async for doc in scan:
+            break
+
+    assert es.clear_scroll.call_count == 3
+    cleared = [call[1]['body']['scroll_id'][0]
+               for call in es.clear_scroll.call_args_list]
+    assert sorted(cleared) == sorted(scroll_ids)
+
+
+@pytest.mark.run_loop
+async def test_sliced_scan_exit_cancels_prefetch(fake_es):
+    async with SlicedScan(fake_es, slices=2, prefetch=2) as scan:
+        async for doc in scan:
+            break
+
+        tasks = [slice_scan._prefetch_task for slice_scan in scan._scans]
+
+    assert all(task.done() for task in tasks)
+    assert fake_es.clear_scroll.call_count == 2
+
+
+@pytest.mark.run_loop
+async def test_sliced_scan_no_index(es):
+    async with SlicedScan(es, index='undefined', slices=2) as scan:
+        assert scan.total == 0
+        cnt = 0
+        async for doc in scan:  # noqa
+            cnt += 1
+        assert cnt == 0
+
+
+@pytest.mark.run_loop
+async def test_scan_prefetch(es, populate):
+    index = 'test_aioes'
+    n = 10
+
+    await populate(index, n, {'foo': 1})
+    ids = set()
+
+    async with Scan(
+        es,
+        index=index,
+        size=3,
+        prefetch=2,
+    ) as scan:
+        async for doc in scan:
+            ids.add(doc['_id'])
+
+    assert ids == {str(i) for i in range(10)}
+
+
+@pytest.mark.run_loop
+async def test_scan_prefetch_cancelled_on_exit(es, populate, mocker):
+    index = 'test_aioes'
+
+    await populate(index, 10, {'foo': 1})
+
+    mocker.spy(es, 'clear_scroll')
+
+    async with Scan(
+        es,
+        index=index,
+        size=1,
+        prefetch=3,
+    ) as scan:
+        async for doc in scan:
+            break
+
+        task = scan._prefetch_task
+
+    assert task.done()
+    es.clear_scroll.assert_called_once_with(
+        body={'scroll_id': [scan.scroll_id]},
+        ignore=404,
+    )
+
+
+@pytest.mark.run_loop
+async def test_scan_prefetch_error(loop, fake_es):
+    exc = TransportError(503, 'search_phase_execution_exception')
+    fake_es.scroll.side_effect = exc
+
+    async with Scan(fake_es, prefetch=2) as scan:
+        assert (await scan.__anext__())['_id'] == '0'
+
+        for _ in range(2):
+            with pytest.raises(TransportError) as cm:
+                await asyncio.wait_for(scan.__anext__(), 1, loop=loop)
+            assert cm.value is exc
+
+
+async def skip_without_pit(es):
+    version = (await es.info())['version']['number']
+    # sorting by _shard_doc is supported since 7.12
+    if tuple(map(int, version.split('.')[:2])) < (7, 12):
+        pytest.skip('point in time scan requires elasticsearch 7.12+')
+
+
+@pytest.mark.run_loop
+async def test_point_in_time_scan_simple(es, populate):
+    await skip_without_pit(es)
+
+    index = 'test_aioes'
+    await populate(index, 10, {'foo': 1})
+    ids = set()
+
+    async with PointInTimeScan(es, index, size=3) as scan:
+        assert isinstance(scan.pit_id, str)
+        assert scan.total['value'] == 10
+        async for doc in scan:
+            ids.add(doc['_id'])
+
+    assert ids == {str(i) for i in range(10)}
+
+
+@pytest.mark.run_loop
+async def test_point_in_time_scan_prefetch(es, populate):
+    await skip_without_pit(es)
+
+    index = 'test_aioes'
+    await populate(index, 10, {'foo': 1})
+    ids = set()
+
+    async with PointInTimeScan(es, index, size=3, prefetch=2) as scan:
+        async for doc in scan:
+            ids.add(doc['_id'])
+
+    assert ids == {str(i) for i in range(10)}
+
+
+@pytest.mark.run_loop
+async def test_point_in_time_scan_closed(es, populate, mocker):
+    await skip_without_pit(es)
+
+    index = 'test_aioes'
+    await populate(index, 10, {'foo': 1})
+
+    mocker.spy(es.transport, 'perform_request')
+
+    async with PointInTimeScan(es, index, size=3) as scan:
+        async for doc in scan:
+            break
+
+    es.transport.perform_request.assert_called_with(
+        'DELETE', '/_pit', body={'id': scan.pit_id}, params={'ignore': 404},
+    )
+
+
+@pytest.mark.run_loop
+async def test_point_in_time_scan_no_index(es):
+    await skip_without_pit(es)
+
+    async with PointInTimeScan(es, 'undefined') as scan:
+        assert scan.pit_id is None
+        assert scan.total == 0
+        cnt = 0
+        async for doc in scan:  # noqa
+            cnt += 1
+        assert cnt == 0
+
+
+def test_point_in_time_scan_pit_id_without_context_manager(es):
+    scan = PointInTimeScan(es, 'index')
+
+    with pytest.raises(RuntimeError):
+        scan.pit_id
+
+
+@pytest.mark.run_loop
+async def test_scan_stream(es, populate):
+    index = 'test_aioes'
+    n = 10
+
+    await populate(index, n, {'foo': 1})
+    ids = set()
+
+    async with Scan(
+        es,
+        index=index,
+        size=3,
+        stream=True,
+    ) as scan:
+        assert isinstance(scan.scroll_id, str)
+        assert scan.total['value'] == 10
+        async for doc in scan:
+            ids.add(doc['_id'])
+
+    assert ids == {str(i) for i in range(10)}
+
+
+def test_scan_stream_with_prefetch(es):
+    with pytest.raises(AssertionError):
+        Scan(es, prefetch=2, stream=True)
@@ -0,0 +1,83 @@
+import datetime
+import decimal
+
+import pytest
+from elasticsearch.serializer import DEFAULT_SERIALIZERS
+
+from aioelasticsearch import SerializationError
+from aioelasticsearch.serializer import (Deserializer, JSONSerializer,
+                                         OrjsonSerializer)
+
+
+@pytest.fixture
+def deserializer():
+    serializers = DEFAULT_SERIALIZERS.copy()
+    serializers[JSONSerializer.mimetype] = JSONSerializer()
+    return Deserializer(serializers)
+
+
+def test_deserializer_bytes(deserializer):
+    assert deserializer.loads(b'{"a": "\xc3\xa9"}') == {'a': '\xe9'}
+
+
+def test_deserializer_bytes_charset(deserializer):
+    assert deserializer.loads(
+        b'{"a": 1}', 'application/json; charset=UTF-8',
+    ) == {'a': 1}
+
+
+def test_deserializer_bytes_text(deserializer):
+    assert deserializer.loads(b'green', 'text/plain') == 'green'
+
+
+def test_deserializer_str(deserializer):
+    assert deserializer.loads('{"a": 1}') == {'a': 1}
+
+
+def test_deserializer_unknown_mimetype(deserializer):
+    with pytest.raises(SerializationError):
+        deserializer.loads(b'{}', 'application/unknown')
+
+
+def test_orjson_dumps():
+    serializer = OrjsonSerializer()
+    assert serializer.dumps({'a': '\xe9'}) == '{"a":"\xe9"}'
+
+
+def test_orjson_dumps_bytes():
+    serializer = OrjsonSerializer()
+    data = {'a': '\xe9', 1: decimal.Decimal('1.5'),
+            'd': datetime.date(2019, 11, 7)}
+    assert serializer.dumps_bytes(data) == (
+        b'{"a":"\xc3\xa9","1":1.5,"d":"2019-11-07"}'
+    )
+
+
+def test_orjson_dumps_bytes_string():
+    serializer = OrjsonSerializer()
+    assert serializer.dumps_bytes('{"a":1}') == '{"a":1}'
+    assert serializer.dumps_bytes(b'{"a":1}') == b'{"a":1}'
+
+
+def test_orjson_dumps_bytes_big_int():
+    serializer = OrjsonSerializer()
+    assert serializer.dumps_bytes({'a': 2 ** 70}) == (
+        b'{"a":1180591620717411303424}'
+    )
+
+
+def test_orjson_dumps_bytes_error():
+    serializer = OrjsonSerializer()
+    with pytest.raises(SerializationError):
+        serializer.dumps_bytes({'a': object()})
+
+
+def test_orjson_loads_bytes():
+    deserializer = Deserializer({'application/json': OrjsonSerializer()})
+    assert deserializer.loads(b'{"a": "\xc3\xa9"}') == {'a': '\xe9'}
+
+
+def test_orjson_loads_error():
+    serializer = OrjsonSerializer()
+    with pytest.raises(SerializationError):
+        serializer.loads(b'{')
@@ -0,0 +1,215 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+from aioelasticsearch.exceptions import (ConnectionError, ConnectionTimeout,
+                                         NotFoundError, SerializationError)
+from aioelasticsearch.streaming import (SearchResponseParser,
+                                        SearchResponseStream)
+
+RESPONSE = {
+    '_scroll_id': 'scroll',
+    'took': 1,
+    'timed_out': False,
+    '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0},
+    'hits': {
+        'total': {'value': 3, 'relation': 'eq'},
+        'max_score': 1.5,
+        'hits': [
+            {'_id': '1', '_source': {'foo': 'bar', 'n': 1.25}},
+            {'_id': '2', '_source': {'foo': 'бар', 'n': [1, 2, 3]}},
+            {'_id': '3', '_source': {'foo': None, 'n': -10}},
+        ],
+    },
+    'aggregations': {'n': {'value': 3}},
+}
+
+
+class Content:
+
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    async def readany(self):
+        if self._chunks:
+            chunk = self._chunks.pop(0)
+            if isinstance(chunk, Exception):
+                raise chunk
+            return chunk
+        return b''
+
+
+class Response:
+
+    def __init__(self, data, chunk_size):
+        self.content = Content(
+            data[i:i + chunk_size] for i in range(0, len(data), chunk_size)
+        )
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+def parse(data, chunk_size):
+    parser = SearchResponseParser()
+
+    for i in range(0, len(data), chunk_size):
+        parser.feed(data[i:i + chunk_size])
+    parser.feed_eof()
+
+    return parser
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, 100000])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_parser(chunk_size, indent):
+    data = json.dumps(RESPONSE, indent=indent, ensure_ascii=False)
+
+    parser = parse(data.encode('utf-8'), chunk_size)
+
+    assert parser.done
+    assert list(parser.hits) == RESPONSE['hits']['hits']
+    assert parser.meta == dict(
+        RESPONSE,
+        hits={'total': {'value': 3, 'relation': 'eq'}, 'max_score': 1.5},
+    )
+
+
+def test_parser_meta_before_hits():
+    data = json.dumps(RESPONSE).encode('utf-8')
+    parser = SearchResponseParser()
+
+    parser.feed(data[:data.index(b'"_source"')])
+
+    assert parser.in_hits
+    assert not parser.done
+    assert not parser.hits
+    assert parser.meta['_scroll_id'] == 'scroll'
+    assert parser.meta['hits']['total'] == {'value': 3, 'relation': 'eq'}
+
+
+def test_parser_number_split():
+    parser = parse(b'{"took": 12, "hits": {"hits": [1.5]}}', 10)
+
+    assert parser.meta['took'] == 12
+    assert list(parser.hits) == [1.5]
+
+
+def test_parser_empty_hits():
+    parser = parse(b'{"hits": {"total": 0, "hits": []}}', 3)
+
+    assert parser.done
+    assert not parser.hits
+    assert parser.meta == {'hits': {'total': 0}}
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'[]',
+    b'{"hits": {"hits": [1, 2',
+    b'{"hits": {"hits": [1 2]}}',
+    b'{"took": 1} 2',
+])
+def test_parser_invalid(data):
+    with pytest.raises(SerializationError):
+        parse(data, 4)
+
+
+@pytest.mark.run_loop
+async def test_stream(loop):
+    response = Response(json.dumps(RESPONSE).encode('utf-8'), 16)
+
+    async with SearchResponseStream(response) as stream:
+        await stream.start()
+
+        assert stream['_scroll_id'] == 'scroll'
+        assert stream['hits']['total']['value'] == 3
+        assert stream.get('aggregations') is None
+
+        hits = []
+        async for hit in stream:
+            hits.append(hit)
+
+        assert response.released
+        assert stream['aggregations'] == {'n': {'value': 3}}
+
+    assert hits == RESPONSE['hits']['hits']
+
+
+@pytest.mark.run_loop
+async def test_stream_read_hits(loop):
+    response = Response(json.dumps(RESPONSE).encode('utf-8'), 64)
+    stream = SearchResponseStream(response)
+    hits = []
+
+    while True:
+        batch = await stream.read_hits()
+        if not batch:
+            break
+        hits.extend(batch)
+
+    assert hits == RESPONSE['hits']['hits']
+    assert response.released
+
+
+@pytest.mark.run_loop
+async def test_stream_invalid(loop):
+    response = Response(b'{"hits": {"hits": [', 4)
+    stream = SearchResponseStream(response)
+
+    with pytest.raises(SerializationError):
+        async for hit in stream:
+            pass
+
+    assert response.released
+
+
+@pytest.mark.parametrize('exc, expected', [
+    (aiohttp.ClientPayloadError('Response payload is not completed'),
+     ConnectionError),
+    (asyncio.TimeoutError(), ConnectionTimeout),
+])
+@pytest.mark.run_loop
+async def test_stream_read_error(loop, exc, expected):
+    response = Response(json.dumps(RESPONSE).encode('utf-8'), 64)
+    response.content._chunks.insert(1, exc)
+    stream = SearchResponseStream(response)
+
+    with pytest.raises(expected) as cm:
+        async for hit in stream:
+            pass
+
+    assert cm.value.info is exc
+    assert response.released
+
+
+@pytest.mark.run_loop
+async def test_search_stream(es, populate):
+    index = 'test_aioes'
+    await populate(index, 10, {'foo': 1})
+
+    stream = await es.search(
+        index=index,
+        body={'aggs': {'foo': {'sum': {'field': 'foo'}}}},
+        params={'stream': True},
+    )
+
+    assert isinstance(stream, SearchResponseStream)
+    assert stream['hits']['total']['value'] == 10
+
+    ids = set()
+    async with stream:
+        async for hit in stream:
+            ids.add(hit['_id'])
+
+    assert ids == {str(i) for i in range(10)}
+    assert stream['aggregations']['foo']['value'] == 10
+
+
+@pytest.mark.run_loop
+async def test_search_stream_error(es):
+    with pytest.raises(NotFoundError):
+        await es.search(index='missing_index', params={'stream': True})
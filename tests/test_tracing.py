@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from aioelasticsearch.tracing import RequestTrace, trace_config
+
+
+class Loop:
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+
+async def send(signal, trace):
+    for callback in signal:
+        await callback(None, SimpleNamespace(trace_request_ctx=trace), None)
+
+
+@pytest.mark.run_loop
+async def test_new_connection(loop):
+    config = trace_config()
+    fake_loop = Loop()
+    trace = RequestTrace(fake_loop)
+
+    for now, signal in [
+        (1, config.on_connection_queued_start),
+        (3, config.on_connection_queued_end),
+        (3, config.on_connection_create_start),
+        (4, config.on_dns_resolvehost_start),
+        (5, config.on_dns_resolvehost_end),
+        (7, config.on_connection_create_end),
+        (11, config.on_request_end),
+    ]:
+        fake_loop.now = now
+        await send(signal, trace)
+
+    fake_loop.now = 14
+    trace.end('body')
+
+    assert trace.phases == {
+        'queue': 2,
+        'dns': 1,
+        'connect': 3,
+        'server': 4,
+        'body': 3,
+    }
+    assert repr(trace) == (
+        'body:3.000s connect:3.000s dns:1.000s queue:2.000s server:4.000s'
+    )
+
+
+@pytest.mark.run_loop
+async def test_reused_connection(loop):
+    config = trace_config()
+    fake_loop = Loop()
+    trace = RequestTrace(fake_loop)
+
+    for now, signal in [
+        (1, config.on_connection_reuseconn),
+        (3, config.on_request_end),
+    ]:
+        fake_loop.now = now
+        await send(signal, trace)
+
+    assert trace.phases == {'server': 2}
+
+
+@pytest.mark.run_loop
+async def test_request_without_trace(loop):
+    config = trace_config()
+
+    await send(config.on_connection_create_end, None)
+    await send(config.on_request_end, None)
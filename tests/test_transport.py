@@ -1,8 +1,14 @@
+import asyncio
+
 import pytest
 
 from aioelasticsearch import (AIOHttpTransport, ConnectionError,
-                              ConnectionTimeout, Elasticsearch, TransportError)
+                              ConnectionTimeout, Elasticsearch, ResponseCache,
+                              RetryBudget, TransportError)
 from aioelasticsearch.connection import AIOHttpConnection
+from aioelasticsearch.helpers import Scan
+from aioelasticsearch.serializer import OrjsonSerializer
+from aioelasticsearch.transport import _is_idempotent_read
 
 
 class DummyConnection(AIOHttpConnection):
@@ -438,3 +444,796 @@ async def test_request_headers(loop, auto_close, es_server, mocker):
         'H3': 'V3',
         'Content-Type': 'application/json',
     }
+
+
+@pytest.mark.run_loop
+async def test_request_bytes_data(loop, auto_close):
+    t = AIOHttpTransport([{}], connection_class=DummyConnection, loop=loop,
+                         data=b'{"a": 1}')
+    auto_close(t)
+
+    ret = await t.perform_request('GET', '/')
+    assert ret == {'a': 1}
+
+
+@pytest.mark.run_loop
+async def test_request_dumps_bytes(loop, auto_close):
+    t = AIOHttpTransport([{}], connection_class=DummyConnection, loop=loop,
+                         serializer=OrjsonSerializer())
+    auto_close(t)
+
+    await t.perform_request('POST', '/', body={'a': 1})
+
+    conn = await t.get_connection()
+    (_, _, _, body), _ = conn.calls[0]
+    assert body == b'{"a":1}'
+
+
+@pytest.mark.run_loop
+async def test_request_dumps_bytes_as_source(loop, auto_close):
+    t = AIOHttpTransport([{}], connection_class=DummyConnection, loop=loop,
+                         serializer=OrjsonSerializer(),
+                         send_get_body_as='source')
+    auto_close(t)
+
+    await t.perform_request('GET', '/', body={'a': 1})
+
+    conn = await t.get_connection()
+    (_, _, params, body), _ = conn.calls[0]
+    assert params['source'] == '{"a":1}'
+    assert body is None
+
+
+@pytest.mark.run_loop
+async def test_request_retry_metrics(loop, auto_close):
+    exc = TransportError(503)
+    t = AIOHttpTransport([{}], connection_class=DummyConnection, loop=loop,
+                         exception=exc)
+    auto_close(t)
+
+    with pytest.raises(TransportError):
+        await t.perform_request('GET', '/index/_doc/1')
+
+    [series] = t.metrics.snapshot()
+    assert series['endpoint'] == 'GET /*/_doc/*'
+    assert series['retries'] == 2
+
+
+@pytest.mark.run_loop
+async def test_connections_share_metrics(loop, auto_close):
+    t = AIOHttpTransport([{}, {'port': 9201}], loop=loop)
+    auto_close(t)
+
+    for conn in t.connection_pool.connections:
+        assert conn.metrics is t.metrics
+
+
+@pytest.mark.run_loop
+async def test_get_connection_while_sniffing(loop, auto_close, mocker):
+    t = AIOHttpTransport([{}, {'port': 9201}], loop=loop)
+    auto_close(t)
+
+    sniff_data = loop.create_future()
+    mocker.patch.object(t, '_get_sniff_data', return_value=sniff_data)
+
+    sniff = asyncio.ensure_future(t.sniff_hosts(), loop=loop)
+    await asyncio.sleep(0, loop=loop)
+
+    conn = await asyncio.wait_for(t.get_connection(), 1, loop=loop)
+    assert conn in t.connection_pool.connections
+
+    sniff.cancel()
+
+
+@pytest.mark.run_loop
+async def test_sniff_in_background(loop, mocker):
+    t = AIOHttpTransport([{}], sniffer_timeout=.01, sniff_in_background=True,
+                         loop=loop)
+
+    async def sniff_hosts():
+        t.last_sniff = loop.time()
+
+    mocker.patch.object(t, 'sniff_hosts', side_effect=sniff_hosts)
+
+    await t.get_connection()
+    assert t.sniff_hosts.call_count == 0
+
+    await asyncio.sleep(.1, loop=loop)
+    assert t.sniff_hosts.call_count >= 2
+
+    task = t.sniffer_task
+    await t.close()
+    assert task.cancelled()
+
+
+@pytest.mark.run_loop
+async def test_sniff_in_background_error(loop, mocker):
+    t = AIOHttpTransport([{}], sniffer_timeout=.01, sniff_in_background=True,
+                         loop=loop)
+    mocker.patch.object(t, 'sniff_hosts',
+                        side_effect=TransportError('N/A', 'Unable to sniff'))
+
+    await asyncio.sleep(.1, loop=loop)
+    assert 2 <= t.sniff_hosts.call_count <= 10
+    assert not t.sniffer_task.done()
+
+    await t.close()
+
+
+@pytest.mark.run_loop
+async def test_sniffer_task_without_background(loop, auto_close):
+    t = auto_close(AIOHttpTransport([{}], sniffer_timeout=10, loop=loop))
+    assert t.sniffer_task is None
+
+
+@pytest.mark.run_loop
+async def test_sniff_hosts_single_flight(loop, auto_close, mocker):
+    t = AIOHttpTransport([{}], loop=loop)
+    auto_close(t)
+
+    sniff_data = loop.create_future()
+    mocker.patch.object(t, '_get_sniff_data', return_value=sniff_data)
+
+    sniffs = [
+        asyncio.ensure_future(t.sniff_hosts(), loop=loop)
+        for _ in range(10)
+    ]
+    await asyncio.sleep(0, loop=loop)
+
+    sniffs[0].cancel()
+    sniff_data.set_result([{'http': {'publish_address': 'localhost:9201'}}])
+    await asyncio.gather(*sniffs[1:], loop=loop)
+
+    assert t._get_sniff_data.call_count == 1
+    assert t._sniff_task is None
+    [conn] = t.connection_pool.connections
+    assert conn.host == 'http://localhost:9201'
+
+
+@pytest.mark.run_loop
+async def test_sniff_hosts_single_flight_error(loop, auto_close, mocker):
+    t = AIOHttpTransport([{}], loop=loop)
+    auto_close(t)
+
+    sniff_data = loop.create_future()
+    mocker.patch.object(t, '_get_sniff_data', return_value=sniff_data)
+
+    sniffs = [
+        asyncio.ensure_future(t.sniff_hosts(), loop=loop)
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0, loop=loop)
+
+    sniff_data.set_exception(TransportError('N/A', 'Unable to sniff hosts.'))
+
+    for sniff in sniffs:
+        with pytest.raises(TransportError):
+            await sniff
+
+    assert t._get_sniff_data.call_count == 1
+
+
+@pytest.mark.run_loop
+async def test_mark_dead_min_sniff_interval(loop, auto_close, mocker):
+    t = AIOHttpTransport([{}, {'port': 9201}], sniff_on_connection_fail=True,
+                         min_sniff_interval=10, loop=loop)
+    auto_close(t)
+
+    async def sniff_hosts():
+        t._sniff_done(None)
+
+    mocker.patch.object(t, 'sniff_hosts', side_effect=sniff_hosts)
+
+    conn1, conn2 = t.connection_pool.connections
+    await t.mark_dead(conn1)
+    await t.mark_dead(conn2)
+    assert t.sniff_hosts.call_count == 1
+
+    t._sniffed_at -= 10
+    await t.mark_dead(conn1)
+    assert t.sniff_hosts.call_count == 2
+
+
+@pytest.mark.run_loop
+async def test_close_cancels_sniff(loop, mocker):
+    t = AIOHttpTransport([{}], loop=loop)
+
+    mocker.patch.object(t, '_get_sniff_data',
+                        return_value=loop.create_future())
+
+    sniff = asyncio.ensure_future(t.sniff_hosts(), loop=loop)
+    await asyncio.sleep(0, loop=loop)
+
+    task = t._sniff_task
+    await t.close()
+
+    assert task.cancelled()
+    with pytest.raises(asyncio.CancelledError):
+        await sniff
+
+
+@pytest.mark.run_loop
+async def test_sniff_hosts_attributes(loop, auto_close, mocker):
+    t = AIOHttpTransport([{}], loop=loop)
+    auto_close(t)
+
+    async def sniff_data(initial=False):
+        return [
+            {'http': {'publish_address': 'localhost:9201'},
+             'attributes': {'zone': 'a'}},
+            {'http': {'publish_address': 'es3.example.com/10.0.0.3:9203'}},
+            {'http': {}},
+        ]
+
+    mocker.patch.object(t, '_get_sniff_data', side_effect=sniff_data)
+
+    await t.sniff_hosts()
+
+    assert sorted(
+        (host for _, host in t.connection_pool.connection_opts),
+        key=lambda host: host['port'],
+    ) == [
+        {'host': 'localhost', 'port': 9201, 'attributes': {'zone': 'a'}},
+        {'host': 'es3.example.com', 'port': 9203},
+    ]
+
+
+@pytest.mark.run_loop
+async def test_sniff_hosts_reuses_connections(loop, auto_close, mocker):
+    t = AIOHttpTransport([{'host': 'localhost', 'port': 9201}], loop=loop)
+    auto_close(t)
+    seed = t.connection_pool.connection
+    zone = 'a'
+
+    async def sniff_data(initial=False):
+        return [
+            {'http': {'publish_address': 'localhost:9201'},
+             'attributes': {'zone': zone}},
+            {'http': {'publish_address': 'localhost:9202'}},
+        ]
+
+    mocker.patch.object(t, '_get_sniff_data', side_effect=sniff_data)
+
+    await t.sniff_hosts()
+    [(reused, host)] = [
+        (conn, host) for conn, host in t.connection_pool.connection_opts
+        if host['port'] == 9201
+    ]
+    assert reused is seed
+    assert host['attributes'] == {'zone': 'a'}
+
+    zone = 'b'
+    await t.sniff_hosts()
+    [(reused, host)] = [
+        (conn, host) for conn, host in t.connection_pool.connection_opts
+        if host['port'] == 9201
+    ]
+    # changed attributes don't make a new connection
+    assert reused is seed
+    assert host['attributes'] == {'zone': 'b'}
+
+
+@pytest.mark.run_loop
+async def test_health_check(loop):
+    t = AIOHttpTransport([{}, {'port': 9201}],
+                         connection_class=DummyConnection,
+                         health_check=True, loop=loop)
+    pool = t.connection_pool
+    pool.dead_timeout = lambda dead_count: .01
+
+    conn = await t.get_connection()
+    conn.exception = ConnectionError('N/A', 'Connection refused', None)
+    await t.mark_dead(conn)
+    # connections compare equal, check identities
+    assert id(conn) not in map(id, pool.connections)
+
+    await asyncio.sleep(.05, loop=loop)
+    # pinged on the timeout schedule until it is up again
+    assert id(conn) not in map(id, pool.connections)
+    assert len(conn.calls) >= 2
+    assert conn.calls[0] == (('HEAD', '/'), {'timeout': 1})
+
+    conn.exception = None
+    await asyncio.sleep(.1, loop=loop)
+    assert id(conn) in map(id, pool.connections)
+    assert conn not in pool.dead_count
+
+    task = t.health_check_task
+    await t.close()
+    assert task.cancelled()
+
+
+@pytest.mark.run_loop
+async def test_health_check_all_dead(loop, auto_close):
+    t = AIOHttpTransport([{}, {'port': 9201}],
+                         connection_class=DummyConnection,
+                         health_check=True, loop=loop)
+    auto_close(t)
+    pool = t.connection_pool
+    conns = list(pool.connections)
+
+    for conn in conns:
+        conn.exception = ConnectionError('N/A', 'Connection refused', None)
+        await t.mark_dead(conn)
+
+    with pytest.raises(ConnectionError):
+        await t.get_connection()
+
+    for conn in conns:
+        assert conn.calls == [(('HEAD', '/'), {'timeout': 1})]
+
+    conns[1].exception = None
+
+    assert await t.get_connection() is conns[1]
+    assert len(pool.connections) == 1
+
+
+@pytest.mark.run_loop
+async def test_shared_session(loop, mocker):
+    t = AIOHttpTransport([{}, {'port': 9201}], shared_session=True,
+                         shared_session_maxsize=20, maxsize=5, loop=loop)
+    session = t.session
+
+    assert session.connector.limit == 20
+    assert session.connector.limit_per_host == 5
+    for conn in t.connection_pool.connections:
+        assert conn.session is session
+
+    async def sniff_data(initial=False):
+        return [{'http': {'publish_address': 'localhost:9202'}}]
+
+    mocker.patch.object(t, '_get_sniff_data', side_effect=sniff_data)
+
+    await t.sniff_hosts()
+    # old connections don't close the session
+    assert not session.closed
+    assert t.connection_pool.connections[0].session is session
+
+    await t.close()
+    assert session.closed
+
+
+@pytest.mark.run_loop
+async def test_shared_session_with_session(loop):
+    with pytest.raises(AssertionError):
+        AIOHttpTransport([{}], shared_session=True, session=object(),
+                         loop=loop)
+
+
+class WarmupConnection(DummyConnection):
+
+    async def warmup(self, count=1, timeout=None):
+        self.calls.append(('warmup', count))
+        return count
+
+
+@pytest.mark.run_loop
+async def test_warmup(loop, auto_close):
+    t = AIOHttpTransport([{}, {'port': 9201}],
+                         connection_class=WarmupConnection, loop=loop)
+    auto_close(t)
+
+    await t.warmup()
+    await t.warmup(3)
+
+    for conn in t.connection_pool.connections:
+        assert conn.calls == [('warmup', 1), ('warmup', 3)]
+
+
+@pytest.mark.run_loop
+async def test_sniff_hosts_warmup(loop, auto_close, mocker):
+    t = AIOHttpTransport([{'host': 'localhost', 'port': 9201}],
+                         connection_class=WarmupConnection,
+                         warmup_connections=2, loop=loop)
+    auto_close(t)
+    seed = t.connection_pool.connection
+
+    async def sniff_data(initial=False):
+        return [
+            {'http': {'publish_address': 'localhost:9201'}},
+            {'http': {'publish_address': 'localhost:9202'}},
+        ]
+
+    mocker.patch.object(t, '_get_sniff_data', side_effect=sniff_data)
+
+    await t.sniff_hosts()
+
+    # the seed connection is reused, only the new one is warmed up
+    new = [
+        conn for conn in t.connection_pool.connections
+        if conn is not seed
+    ]
+    assert len(new) == 1
+    assert len(t.connection_pool.connections) == 2
+    assert new[0].calls == [('warmup', 2)]
+    assert seed.calls == []
+
+
+@pytest.mark.run_loop
+async def test_request_retry_backoff(loop, auto_close, mocker):
+    exc = ConnectionError('N/A', 'Connection refused', None)
+    t = AIOHttpTransport([{}], connection_class=DummyConnection, loop=loop,
+                         exception=exc, retry_backoff=.01, retry_backoff_max=1)
+    auto_close(t)
+    backoff = mocker.patch('aioelasticsearch.transport.backoff',
+                           return_value=.01)
+
+    start = loop.time()
+    with pytest.raises(ConnectionError):
+        await t.perform_request('GET', '/')
+
+    assert loop.time() - start >= .02
+    assert backoff.call_args_list == [
+        mocker.call(1, .01, 1),
+        mocker.call(2, .01, 1),
+    ]
+
+
+@pytest.mark.run_loop
+async def test_request_retry_budget(loop, auto_close):
+    exc = ConnectionError('N/A', 'Connection refused', None)
+    budget = RetryBudget(ratio=1, min_per_second=0, max_tokens=1, loop=loop)
+    t = AIOHttpTransport([{}], connection_class=DummyConnection, loop=loop,
+                         exception=exc, retry_budget=budget)
+    auto_close(t)
+    conn = t.connection_pool.connection
+
+    with pytest.raises(ConnectionError):
+        await t.perform_request('GET', '/')
+    assert len(conn.calls) == 2
+
+    with pytest.raises(ConnectionError):
+        await t.perform_request('GET', '/')
+    assert len(conn.calls) == 3
+
+    conn.exception = None
+    await t.perform_request('GET', '/')
+
+    conn.exception = exc
+    with pytest.raises(ConnectionError):
+        await t.perform_request('GET', '/')
+    assert len(conn.calls) == 6
+
+
+class SlowConnection(DummyConnection):
+
+    def __init__(self, **kwargs):
+        self.delay = kwargs.pop('delay', 0)
+        super().__init__(**kwargs)
+
+    async def perform_request(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        await asyncio.sleep(self.delay, loop=self.loop)
+        if self.exception:
+            raise self.exception
+        return self.status, self.headers, self.data
+
+
+def hedged_transport(loop, mocker, **kwargs):
+    t = AIOHttpTransport([{'delay': 10, 'data': '{"node": 1}'},
+                          {'port': 9201, 'data': '{"node": 2}'}],
+                         connection_class=SlowConnection, loop=loop, **kwargs)
+    slow, fast = sorted(t.connection_pool.connections,
+                        key=lambda conn: conn.delay, reverse=True)
+
+    async def get_connection():
+        return slow
+
+    mocker.patch.object(t, 'get_connection', side_effect=get_connection)
+
+    return t, slow, fast
+
+
+@pytest.mark.run_loop
+async def test_hedged_request(loop, auto_close, mocker):
+    t, slow, fast = hedged_transport(loop, mocker, hedge_after=.01)
+    auto_close(t)
+
+    data = await t.perform_request('POST', '/index/_search', body={})
+
+    assert data == {'node': 2}
+    assert len(slow.calls) == 1
+    assert len(fast.calls) == 1
+
+
+@pytest.mark.run_loop
+async def test_hedged_request_first_wins(loop, auto_close, mocker):
+    t, slow, fast = hedged_transport(loop, mocker, hedge_after=.01)
+    auto_close(t)
+    slow.delay = 0
+
+    data = await t.perform_request('GET', '/index/_doc/1')
+
+    assert data == {'node': 1}
+    assert fast.calls == []
+
+
+@pytest.mark.run_loop
+async def test_hedged_request_not_idempotent(loop, auto_close, mocker):
+    t, slow, fast = hedged_transport(loop, mocker, hedge_after=.01)
+    auto_close(t)
+    slow.delay = .05
+
+    data = await t.perform_request('POST', '/index/_doc', body={})
+
+    assert data == {'node': 1}
+    assert fast.calls == []
+
+
+@pytest.mark.run_loop
+async def test_hedged_request_scroll(loop, auto_close, mocker):
+    t, slow, fast = hedged_transport(loop, mocker, hedge_after=.01)
+    auto_close(t)
+    slow.delay = .05
+
+    # a duplicate would open another scroll context
+    data = await t.perform_request('POST', '/index/_search', body={},
+                                   params={'scroll': '5m'})
+
+    assert data == {'node': 1}
+    assert fast.calls == []
+
+
+@pytest.mark.run_loop
+async def test_hedged_request_error(loop, auto_close, mocker):
+    t, slow, fast = hedged_transport(loop, mocker, hedge_after=.01)
+    auto_close(t)
+    slow.delay = .05
+    fast.exception = ConnectionError('N/A', 'Connection refused', None)
+
+    data = await t.perform_request('GET', '/index/_doc/1')
+
+    # the hedge failed, the first one responded later
+    assert data == {'node': 1}
+    assert fast in t.connection_pool.dead_count
+
+
+@pytest.mark.run_loop
+async def test_hedged_request_not_retryable_error(loop, auto_close, mocker):
+    t, slow, fast = hedged_transport(loop, mocker, hedge_after=.01)
+    auto_close(t)
+    fast.exception = TransportError(400, 'Bad request')
+
+    with pytest.raises(TransportError):
+        await t.perform_request('GET', '/index/_doc/1')
+
+    assert len(slow.calls) == 1
+
+
+@pytest.mark.run_loop
+async def test_hedged_request_budget(loop, auto_close, mocker):
+    budget = RetryBudget(ratio=0, min_per_second=0, max_tokens=0, loop=loop)
+    t, slow, fast = hedged_transport(loop, mocker, hedge_after=.01,
+                                     retry_budget=budget)
+    auto_close(t)
+    slow.delay = .05
+
+    await t.perform_request('GET', '/index/_doc/1')
+
+    assert fast.calls == []
+
+
+@pytest.mark.run_loop
+async def test_hedge_delay(loop, auto_close):
+    t = AIOHttpTransport([{}], hedge_after=.01, hedge_quantile=.95,
+                         loop=loop)
+    auto_close(t)
+
+    assert t._hedge_delay('GET', '/index/_doc/1') == .01
+    assert t._hedge_delay('POST', '/index/_doc/1') is None
+
+    for _ in range(10):
+        t.metrics.observe_request('a', 'GET', '/index/_doc/1', 200, .2)
+
+    assert t._hedge_delay('GET', '/index/_doc/2') == pytest.approx(.2425)
+
+
+@pytest.mark.parametrize('method,url,params,expected', [
+    ('GET', '/index/_doc/1', None, True),
+    ('HEAD', '/index', None, True),
+    ('POST', '/index/_search', None, True),
+    ('POST', '/index/_search', {'size': 10}, True),
+    ('POST', '/_mget?refresh=true', None, True),
+    ('POST', '/index/_count', None, True),
+    ('POST', '/index/_search', {'scroll': '5m'}, False),
+    ('GET', '/index/_search', {'scroll': '5m'}, False),
+    ('GET', '/_search/scroll/abc', None, False),
+    ('POST', '/_search/scroll', None, False),
+    ('POST', '/index/_doc', None, False),
+    ('PUT', '/index/_doc/1', None, False),
+    ('DELETE', '/index/_doc/1', None, False),
+])
+def test_is_idempotent_read(method, url, params, expected):
+    assert _is_idempotent_read(method, url, params) is expected
+
+
+@pytest.mark.run_loop
+async def test_coalesce_reads(loop, auto_close):
+    t = AIOHttpTransport([{'delay': .01}], connection_class=SlowConnection,
+                         coalesce_reads=True, loop=loop)
+    auto_close(t)
+    conn = t.connection_pool.connection
+
+    results = await asyncio.gather(
+        t.perform_request('POST', '/index/_search', body={'size': 1}),
+        t.perform_request('POST', '/index/_search', body={'size': 1}),
+        t.perform_request('POST', '/index/_search', body={'size': 2}),
+        t.perform_request('GET', '/index/_doc/1', params={'a': 1}),
+        t.perform_request('GET', '/index/_doc/1', params={'a': 1}),
+        t.perform_request('GET', '/index/_doc/1', params={'a': 2}),
+        t.perform_request('POST', '/index/_doc', body={}),
+        t.perform_request('POST', '/index/_doc', body={}),
+        loop=loop
+    )
+
+    assert len(conn.calls) == 6
+    assert results[0] is results[1]
+    assert results[0] is not results[2]
+    assert results[3] is results[4]
+    assert t._coalesced == {}
+
+    await t.perform_request('POST', '/index/_search', body={'size': 1})
+    assert len(conn.calls) == 7
+
+
+@pytest.mark.run_loop
+async def test_coalesce_reads_scan(loop, auto_close):
+    data = (
+        '{"_scroll_id": "sid", "_shards": {"total": 1, "successful": 1},'
+        ' "hits": {"total": {"value": 0}, "hits": []}}'
+    )
+    es = auto_close(Elasticsearch([{'delay': .01, 'data': data}],
+                                  connection_class=SlowConnection,
+                                  coalesce_reads=True, loop=loop))
+    conn = es.transport.connection_pool.connection
+
+    # every scan has to get a scroll context of its own
+    scans = [Scan(es, index='index'), Scan(es, index='index')]
+    await asyncio.gather(*[scan.__aenter__() for scan in scans], loop=loop)
+    await asyncio.gather(*[scan.__aexit__() for scan in scans], loop=loop)
+
+    searches = [
+        args for args, _ in conn.calls if args[1] == '/index/_search'
+    ]
+    assert len(searches) == 2
+
+
+@pytest.mark.run_loop
+async def test_coalesce_reads_error(loop, auto_close):
+    exc = TransportError(400, 'Bad request')
+    t = AIOHttpTransport([{'delay': .01}], connection_class=SlowConnection,
+                         coalesce_reads=True, exception=exc, loop=loop)
+    auto_close(t)
+    conn = t.connection_pool.connection
+
+    results = await asyncio.gather(
+        t.perform_request('GET', '/index/_doc/1'),
+        t.perform_request('GET', '/index/_doc/1'),
+        loop=loop,
+        return_exceptions=True
+    )
+
+    assert results == [exc, exc]
+    assert len(conn.calls) == 1
+
+
+@pytest.mark.run_loop
+async def test_coalesce_reads_cancel(loop, auto_close):
+    t = AIOHttpTransport([{'delay': .01}], connection_class=SlowConnection,
+                         coalesce_reads=True, loop=loop)
+    auto_close(t)
+    conn = t.connection_pool.connection
+
+    first = asyncio.ensure_future(t.perform_request('GET', '/index/_doc/1'),
+                                  loop=loop)
+    second = asyncio.ensure_future(t.perform_request('GET', '/index/_doc/1'),
+                                   loop=loop)
+    await asyncio.sleep(0, loop=loop)
+    first.cancel()
+
+    assert await second == {}
+    assert len(conn.calls) == 1
+
+
+@pytest.mark.run_loop
+async def test_response_cache(loop, auto_close):
+    cache = ResponseCache(loop=loop)
+    t = AIOHttpTransport([{'data': '{"a": 1}'}],
+                         connection_class=DummyConnection,
+                         response_cache=cache, cache_reads=True, loop=loop)
+    auto_close(t)
+    conn = t.connection_pool.connection
+
+    first = await t.perform_request('POST', '/index/_search', body={'a': 1})
+    second = await t.perform_request('POST', '/index/_search', body={'a': 1})
+
+    assert first == second == {'a': 1}
+    # every caller gets its own result
+    assert first is not second
+    assert len(conn.calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.size == len('{"a": 1}')
+
+    await t.perform_request('POST', '/index/_search', body={'a': 2})
+    await t.perform_request('GET', '/index/_doc/1', params={'a': 1})
+    await t.perform_request('GET', '/index/_doc/1', params={'a': 2})
+    await t.perform_request('POST', '/index/_doc', body={'a': 1})
+    await t.perform_request('POST', '/index/_doc', body={'a': 1})
+    assert len(conn.calls) == 6
+
+    await t.perform_request('GET', '/index/_doc/1', params={'a': 1})
+    assert len(conn.calls) == 6
+
+    # opt-out
+    await t.perform_request('GET', '/index/_doc/1',
+                            params={'a': 1, 'cache': False})
+    assert len(conn.calls) == 7
+
+    await t.perform_request('GET', '/index/_doc/1', params={'a': 1},
+                            headers={'x-opaque-id': 'a'})
+    await t.perform_request('GET', '/index/_doc/1', params={'a': 1},
+                            headers={'x-opaque-id': 'b'})
+    await t.perform_request('GET', '/index/_doc/1', params={'a': 1},
+                            headers={'x-opaque-id': 'a'})
+    assert len(conn.calls) == 9
+
+
+@pytest.mark.run_loop
+async def test_response_cache_size(loop, auto_close):
+    cache = ResponseCache(loop=loop)
+    t = AIOHttpTransport([{'data': '{"a": "\u00e9"}'}],
+                         connection_class=DummyConnection,
+                         response_cache=cache, cache_reads=True, loop=loop)
+    auto_close(t)
+
+    assert await t.perform_request('GET', '/index/_doc/1') == {'a': '\u00e9'}
+
+    # the size is in bytes
+    assert cache.size == len('{"a": "\u00e9"}'.encode('utf-8'))
+
+
+@pytest.mark.run_loop
+async def test_response_cache_opt_in(loop, auto_close):
+    cache = ResponseCache(loop=loop)
+    t = AIOHttpTransport([{}], connection_class=DummyConnection,
+                         response_cache=cache, loop=loop)
+    auto_close(t)
+    conn = t.connection_pool.connection
+
+    await t.perform_request('GET', '/index/_doc/1')
+    await t.perform_request('GET', '/index/_doc/1')
+    assert len(conn.calls) == 2
+
+    await t.perform_request('GET', '/index/_doc/1', params={'cache': True})
+    await t.perform_request('GET', '/index/_doc/1', params={'cache': True})
+    assert len(conn.calls) == 3
+
+
+@pytest.mark.run_loop
+async def test_response_cache_scroll(loop, auto_close):
+    cache = ResponseCache(loop=loop)
+    t = AIOHttpTransport([{'data': '{"_scroll_id": "sid"}'}],
+                         connection_class=DummyConnection,
+                         response_cache=cache, cache_reads=True, loop=loop)
+    auto_close(t)
+    conn = t.connection_pool.connection
+
+    for _ in range(2):
+        await t.perform_request('POST', '/index/_search', body={},
+                                params={'scroll': '5m'})
+
+    # every search opens a scroll context of its own
+    assert len(conn.calls) == 2
+    assert len(cache) == 0
+
+
+@pytest.mark.run_loop
+async def test_response_cache_not_success(loop, auto_close):
+    cache = ResponseCache(loop=loop)
+    t = AIOHttpTransport([{'status': 404}], connection_class=DummyConnection,
+                         response_cache=cache, cache_reads=True, loop=loop)
+    auto_close(t)
+
+    await t.perform_request('GET', '/index/_doc/1', params={'ignore': 404})
+
+    assert len(cache) == 0